@@ -17,10 +17,13 @@ VSCode4z 專案建置腳本，用於自動化打包和發布流程。
   1. 取得 build.py 腳本所在目錄（考量是否打包為 .exe）。
   2. 根據參數設定工作區（workspace）。
   3. 執行 scripts/download.py，並傳入 --workspace 參數。
-  4. 使用 pyinstaller --onefile 打包 scripts 下的 install.py、workspace.py 與 uninstall.py。
-  5. 將 scripts/dist 中的 .exe 複製到 workspace 目錄下。
+  4. 使用 pyinstaller --onefile 同時打包 scripts 下的 install.py、workspace.py 與 uninstall.py。
+  5. 將 scripts/dist 中的 .exe 移動到 workspace 目錄下。
   6. 刪除 scripts 目錄中除 .py 與 .yml 以外的所有檔案及目錄。
-  7. 最後將 workspace 目錄下的所有內容打包為 VSCode4z-<version>.zip。
+  7. 最後將 workspace 目錄下的所有內容（DEVELOPMENT_ONLY 中的 tests 等開發用項目除外）打包為 VSCode4z-<version>.zip（或依 build.yml 的 archive_format 設定輸出 tar.zst、7z，
+     auto 則優先使用 tar.zst；壓縮等級依 compression_tier 設定 fast、balanced、max）。
+     zip 格式時，scripts 與執行檔以外的內容會在步驟 3 完成後於背景先行壓縮至暫存檔（<輸出檔>.static），與步驟 4～6 同時進行，
+     最後附加建置產物成功後才改名為正式輸出檔；建置或壓縮失敗時刪除暫存檔並以錯誤結束。
 
 更新記錄:
 - v2.6.0: 優化建置流程，改善配置載入和檔案管理
@@ -34,17 +37,68 @@ import os
 import sys
 import argparse
 import subprocess
-import shutil
-import pyminizip
 import glob
-import fnmatch
+import importlib
+import importlib.util
+import json
+import locale
+import tarfile
+import tempfile
+import time
+import traceback
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from configs import load_build_config
-from utils.path_utils import get_script_dir
+from utils.file_utils import fast_rmtree, sendfile_copy
+from utils.path_utils import compile_patterns, get_script_dir
+from utils.zip_utils import (
+    raw_zip_supported,
+    write_raw_entry,
+    begin_raw_entry,
+    write_raw_data,
+    end_raw_entry,
+    read_raw_entry
+)
+
+# zip 平行壓縮時每個區段的大小，以及 DEFLATE 可回溯參照的視窗大小（作為下一段的預設字典）
+DEFLATE_CHUNK_SIZE = 4 << 20
+DEFLATE_WINDOW_SIZE = 32 << 10
+
+# 建置過程中才產生或變動的 workspace 第一層項目，zip 格式會在其餘內容壓縮完成後再附加
+BUILD_PRODUCTS = ("scripts", "install.exe", "workspace.exe", "uninstall.exe")
+
+# 只供開發使用、不打包進發行壓縮檔的 workspace 第一層項目
+DEVELOPMENT_ONLY = ("tests",)
+
+# build.yml 中 compression_tier 對應各壓縮格式的壓縮等級（balanced 即各格式原本的預設值）
+COMPRESSION_TIERS = {
+    "fast": {"tar.zst": 3, "7z": 1, "zip": 1},
+    "balanced": {"tar.zst": 15, "7z": 6, "zip": 5},
+    "max": {"tar.zst": 22, "7z": 9, "zip": 9},
+}
 
 # -------------------------------
 #  功能函式
 # -------------------------------
+def import_optional(module_name):
+    """
+    於實際用到時才匯入選用的壓縮模組（zstandard、py7zr 含原生擴充模組，匯入成本較高），
+    提早結束或只輸出 zip 時不必付出匯入成本。未安裝時回傳 None。
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+def is_module_available(module_name):
+    """
+    確認選用模組是否已安裝，只查找模組而不實際匯入。
+    """
+    return importlib.util.find_spec(module_name) is not None
+
 def run_download_py(workspace, scripts_dir):
     """
     執行 scripts 目錄下的 download.py，並傳入 --workspace 參數。
@@ -59,104 +113,529 @@ def run_download_py(workspace, scripts_dir):
     if result.returncode != 0:
         sys.exit("download.py 執行失敗，請確認錯誤訊息。")
 
+def run_pyinstaller(scripts_dir, script):
+    """
+    於目前的 Python 行程中直接呼叫 PyInstaller 打包單一腳本，省去另外啟動 pyinstaller 命令列程式的成本。
+    供 ProcessPoolExecutor 的工作行程使用：行程的標準輸出與錯誤輸出導向暫存檔，打包完成後一併回傳。
+    
+    :return: (returncode, 打包過程的輸出內容)
+    """
+    from PyInstaller import __main__ as pyinstaller_main
+    os.chdir(scripts_dir)
+    with tempfile.TemporaryFile() as log:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            pyinstaller_main.run(["--onefile", script])
+            returncode = 0
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        log.seek(0)
+        return returncode, log.read().decode(locale.getpreferredencoding(False), errors="replace")
+
+def run_pyinstaller_subprocess(scripts_dir, script):
+    """
+    以子行程執行 pyinstaller 命令列程式打包單一腳本（目前的 Python 環境無法匯入 PyInstaller 時使用）。
+    
+    :return: (returncode, 打包過程的輸出內容)
+    """
+    result = subprocess.run(
+        ["pyinstaller", "--onefile", script],
+        cwd=scripts_dir,
+        capture_output=True,
+        text=True
+    )
+    return result.returncode, (result.stdout or "") + (result.stderr or "")
+
 def build_executables(scripts_dir):
     """
-    分別對 scripts 目錄下的 install.py、workspace.py 與 uninstall.py 執行 pyinstaller --onefile 打包。
+    同時對 scripts 目錄下的 install.py、workspace.py 與 uninstall.py 執行 pyinstaller --onefile 打包。
+    可匯入 PyInstaller 時，每個腳本交由獨立的工作行程直接呼叫 PyInstaller（其全域狀態不可重複使用，因此每個行程只打包一個腳本）；
+    否則退回以子行程執行 pyinstaller 命令列程式。
+    各腳本的輸出分別擷取，於該腳本打包完成後才印出，避免多個 pyinstaller 的訊息交錯。
     """
-    for script in ["install.py", "workspace.py", "uninstall.py"]:
-        print(f"開始打包 {script}...")
-        result = subprocess.run(
-            ["pyinstaller", "--onefile", script],
-            cwd=scripts_dir
-        )
-        if result.returncode != 0:
-            sys.exit(f"打包 {script} 失敗。")
+    scripts = ["install.py", "workspace.py", "uninstall.py"]
+    max_workers = min(len(scripts), os.cpu_count() or 1)
+    if importlib.util.find_spec("PyInstaller") is not None:
+        executor = ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=1)
+        runner = run_pyinstaller
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        runner = run_pyinstaller_subprocess
+    with executor:
+        futures = {}
+        for script in scripts:
+            print(f"開始打包 {script}...")
+            futures[executor.submit(runner, scripts_dir, script)] = script
+        failed = []
+        for future in as_completed(futures):
+            script = futures[future]
+            returncode, output = future.result()
+            if output:
+                print(output)
+            if returncode != 0:
+                print(f"打包 {script} 失敗。")
+                failed.append(script)
+            else:
+                print(f"打包 {script} 完成。")
+    if failed:
+        sys.exit(f"打包 {'、'.join(failed)} 失敗。")
 
-def copy_exes_to_workspace(scripts_dir, workspace):
+def move_exes_to_workspace(scripts_dir, workspace):
     """
-    將 scripts 目錄下 dist 資料夾內的所有 .exe 檔案複製到 workspace 中。
+    將 scripts 目錄下 dist 資料夾內的所有 .exe 檔案移動到 workspace 中。
+    dist 目錄在打包後即會刪除，因此同一磁碟內直接以 os.replace 改名，不需讀寫檔案內容；
+    跨磁碟無法改名時才退回複製（Linux 上以 os.sendfile 於核心內複製）。
     """
     dist_dir = os.path.join(scripts_dir, "dist")
     if not os.path.exists(dist_dir):
         sys.exit("找不到打包後的 dist 目錄")
     for exe_file in glob.glob(os.path.join(dist_dir, "*.exe")):
         dest = os.path.join(workspace, os.path.basename(exe_file))
-        print(f"複製 {os.path.basename(exe_file)} 到 {workspace}")
-        shutil.copy(exe_file, dest)
+        print(f"移動 {os.path.basename(exe_file)} 到 {workspace}")
+        try:
+            os.replace(exe_file, dest)
+        except OSError:
+            sendfile_copy(exe_file, dest)
+    fast_rmtree(dist_dir)
 
 def clean_scripts_directory(scripts_dir):
     """
     刪除 scripts 目錄下，除 .py 和 configs、utils 目錄以外的所有檔案與目錄。
+    build 等建置產物目錄以 fast_rmtree 刪除。
     """
-    for item in os.listdir(scripts_dir):
+    with os.scandir(scripts_dir) as it:
+        entries = list(it)
+    for entry in entries:
         # 若是檔案且副檔名不是 .py
-        if os.path.isfile(os.path.join(scripts_dir, item)) and not item.lower().endswith(".py"):
-            print(f"刪除檔案: {item}")
-            os.remove(os.path.join(scripts_dir, item))
+        if entry.is_file() and not entry.name.lower().endswith(".py"):
+            print(f"刪除檔案: {entry.name}")
+            os.remove(entry.path)
         # 若是目錄，保留 configs 和 utils 目錄，刪除其他目錄
-        elif os.path.isdir(os.path.join(scripts_dir, item)):
-            if item in ["configs", "utils"]:
-                print(f"保留目錄: {item}")
+        elif entry.is_dir():
+            if entry.name in ["configs", "utils"]:
+                print(f"保留目錄: {entry.name}")
             else:
-                print(f"刪除目錄: {item}")
-                shutil.rmtree(os.path.join(scripts_dir, item))
+                print(f"刪除目錄: {entry.name}")
+                fast_rmtree(entry.path)
 
-def gather_files(root_dir, exclude_dirs=None, exclude_files=None):
+def gather_files(root_dir, exclude_dirs=None, exclude_files=None, include_top_level=None, exclude_top_level=None):
     """
-    遞迴遍歷 root_dir，蒐集所有要壓縮的檔案及其相對路徑，
+    以 os.scandir 遞迴遍歷 root_dir，逐一產生要壓縮的檔案及其相對路徑，
     並根據 exclude_patterns 排除符合條件的目錄及檔案。
+    直接沿用 DirEntry 的名稱與類型資訊，不需額外 stat，也不必先蒐集完整清單；
+    相對路徑隨遞迴逐層串接，每個目錄只組一次，不必對每個檔案重新計算。
     
     :param root_dir: 要壓縮的來源目錄（字串或 Path 皆可）
     :param exclude_dirs: 要排除的目錄名稱模式清單，例如 [".git"]
     :param exclude_files: 要排除的檔案名稱模式清單，例如 ["*.tmp"]
-    :return: 兩個清單 (file_abs_paths, prefix_rel_paths)
-         file_abs_paths：每個檔案的絕對路徑
-         prefix_rel_paths：在 zip 中的相對存放路徑（以 root_dir 為根）
+    :param include_top_level: 若指定，root_dir 第一層只處理這些名稱的檔案或目錄
+    :param exclude_top_level: root_dir 第一層要略過的檔案或目錄名稱（不影響更深層的同名項目）
+    :return: 逐一產生 (file_abs_path, prefix_rel_path, arcname) 的 generator
+         file_abs_path：檔案的絕對路徑
+         prefix_rel_path：在壓縮檔中的相對存放路徑（以 root_dir 為根，根目錄為空字串）
+         arcname：在壓縮檔中的完整名稱（prefix_rel_path 加上檔名）
     """
-    file_abs_paths = []
-    prefix_rel_paths = []
+    # 排除模式預先編譯為單一比對函式（固定名稱以集合查表），每個項目只需比對一次
+    match_exclude_dir = compile_patterns(tuple(exclude_dirs or ()))
+    match_exclude_file = compile_patterns(tuple(exclude_files or ()))
+
+    def walk(current_dir, prefix):
+        # 每個目錄只組一次帶分隔符號的前綴，其下項目直接串接名稱（與 os.walk 內部相同的作法）
+        prefix_sep = prefix + os.sep if prefix else ""
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                if not prefix:
+                    if include_top_level is not None and entry.name not in include_top_level:
+                        continue
+                    if exclude_top_level and entry.name in exclude_top_level:
+                        continue
+                if entry.is_dir():
+                    # 與 os.walk 預設相同，不進入符號連結的目錄；排除的目錄直接略過，不往下遍歷
+                    if entry.is_symlink() or match_exclude_dir(entry.name):
+                        continue
+                    yield from walk(entry.path, prefix_sep + entry.name)
+                # 若檔案名稱符合任何排除模式，則略過
+                elif not match_exclude_file(entry.name):
+                    yield entry.path, prefix, prefix_sep + entry.name
+
+    return walk(os.fspath(root_dir), "")
+
+def gather_files_grouped(root_dir, exclude_dirs=None, exclude_files=None, exclude_top_level=None):
+    """
+    與 gather_files 相同，但一次蒐集完整清單後依副檔名、檔案大小、再依壓縮檔中的名稱排序，
+    讓同類型的檔案在壓縮檔中相鄰，供 tar.zst、7z 這類整體連續壓縮的格式更能重複利用前文字典。
+    （zip 各項目獨立壓縮，順序不影響壓縮率，因此不需使用。）
     
-    if exclude_dirs is None:
-        exclude_dirs = []
-    if exclude_files is None:
-        exclude_files = []
-
-    for root, dirs, files in os.walk(root_dir):
-        # 排除那些目錄（直接在 dirs 中作過濾，以避免往下遍歷這些資料夾）
-        dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pat) for pat in exclude_dirs)]
-        
-        for file in files:
-            # 若檔案名稱符合任何排除模式，則略過
-            if any(fnmatch.fnmatch(file, pat) for pat in exclude_files):
-                continue
-            file_abs_paths.append(os.path.join(root, file))
-            prefix_rel_paths.append("" if os.path.relpath(root, start=root_dir) == "." else os.path.relpath(root, start=root_dir))
-            
-    return file_abs_paths, prefix_rel_paths
-
-def compress_directory(root_dir, output_zip, exclude_dirs=None, exclude_files=None):
-    """
-    利用 pyminizip 將 root_dir 目錄下（排除指定檔案/目錄後）的檔案壓縮成 output_zip。
+    :param exclude_top_level: root_dir 第一層要略過的檔案或目錄名稱
+    :return: 排序後的 (file_abs_path, prefix_rel_path, arcname) 清單
+    """
+    files = list(gather_files(root_dir, exclude_dirs, exclude_files, exclude_top_level=exclude_top_level))
+    # 最後以壓縮檔中的名稱排序，副檔名與大小都相同的檔案也有固定順序，不受檔案系統列出順序影響
+    files.sort(key=lambda item: (os.path.splitext(item[2])[1].lower(), os.path.getsize(item[0]), item[2]))
+    return files
+
+def deflate_chunk(file_path, offset, length, level=5, final=True):
+    """
+    以 raw DEFLATE（無 zlib 標頭，即 zip 內部使用的格式）壓縮檔案中的一段資料，並計算該段的 CRC32。
+    比照 pigz 的做法：以前一段最後 32 KiB 作為預設字典維持壓縮率，非最後一段以 Z_SYNC_FLUSH 結尾，
+    各段壓縮結果依序串接即為完整的 DEFLATE 資料流，因此同一個大型檔案的各段可交由不同執行緒同時壓縮。
+    zlib 壓縮時會釋放 GIL，多個執行緒可同時使用多個 CPU 核心。
+    
+    :param file_path: 要壓縮的檔案路徑
+    :param offset: 此段資料在檔案中的起始位置
+    :param length: 此段資料的長度
+    :param level: 壓縮等級 (0~9)
+    :param final: 是否為檔案的最後一段
+    :return: (壓縮後資料, 此段資料的 CRC32)
+    """
+    with open(file_path, "rb") as f:
+        zdict = b""
+        if offset:
+            dict_start = max(0, offset - DEFLATE_WINDOW_SIZE)
+            f.seek(dict_start)
+            zdict = f.read(offset - dict_start)
+        data = f.read(length)
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.crc32(data)
+
+def crc32_file(file_path, length):
+    """
+    計算檔案前 length 位元組的 CRC32，供分段壓縮的大型檔案使用。
+    """
+    crc = 0
+    with open(file_path, "rb") as f:
+        while length > 0:
+            data = f.read(min(length, 1 << 20))
+            if not data:
+                break
+            crc = zlib.crc32(data, crc)
+            length -= len(data)
+    return crc
+
+def zipinfo_from_stat(arcname, st):
+    """
+    依已取得的 os.stat 結果建立 ZipInfo，與 ZipInfo.from_file 相同但不必再 stat 一次。
+    """
+    date_time = time.localtime(st.st_mtime)[0:6]
+    # zip 格式只能記錄 1980 ~ 2107 年的時間
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    elif date_time[0] > 2107:
+        date_time = (2107, 12, 31, 23, 59, 59)
+    zinfo = zipfile.ZipInfo(arcname.replace(os.sep, "/"), date_time)
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    return zinfo
+
+def discard_zip_manifest(output_zip):
+    """
+    刪除 output_zip 的 manifest，下次打包時全部重新壓縮。
+    """
+    try:
+        os.remove(output_zip + ".manifest.json")
+    except FileNotFoundError:
+        pass
+
+def load_zip_manifest(output_zip, level):
+    """
+    讀取上次打包留下的 manifest（記錄各檔案打包當時的修改時間與大小）。
+    若壓縮檔或 manifest 不存在、格式錯誤，或壓縮等級不同，則回傳空字典，表示全部重新壓縮。
+    壓縮檔損毀（例如寫入到一半中斷）而無法開啟時，一併刪除 manifest，避免之後每次打包都沿用失敗。
+    """
+    manifest_path = output_zip + ".manifest.json"
+    if not (os.path.isfile(output_zip) and os.path.isfile(manifest_path)):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    try:
+        with zipfile.ZipFile(output_zip, "r"):
+            pass
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"上次的壓縮檔無法開啟（{e}），捨棄其 manifest 並全部重新壓縮。")
+        discard_zip_manifest(output_zip)
+        return {}
+    if manifest.get("level") != level:
+        return {}
+    return manifest.get("files", {})
+
+def compress_directory(root_dir, output_zip, exclude_dirs=None, exclude_files=None, level=5,
+                       include_top_level=None, exclude_top_level=None, append=False, reuse_zip=None):
+    """
+    將 root_dir 目錄下（排除指定檔案/目錄後）的檔案壓縮成 output_zip。
+    各檔案切分為 4 MiB 的區段，DEFLATE 壓縮交由執行緒池平行處理，主執行緒再依序寫入 zip；
+    大型檔案也能同時使用多個 CPU 核心，且記憶體中最多只保留固定數量的區段。
+    若上次打包的 zip 與其 manifest（output_zip.manifest.json）仍在，修改時間與大小皆未變動的檔案
+    直接沿用舊 zip 中已壓縮的資料，只重新壓縮有變動的檔案。
+    預先壓縮資料的寫入經由 utils.zip_utils 進行；目前的 zipfile 不支援時（raw_zip_supported 為 False），
+    改以公開的 ZipFile.write 逐一循序壓縮，不沿用舊資料。
+    append 為 True 時，將檔案直接附加至既有的 output_zip（例如先壓縮好的靜態內容之後，再補上建置產物）。
+    reuse_zip 可指定要沿用資料的上次壓縮檔（例如輸出至暫存名稱時，沿用上次正式輸出的 zip），預設為 output_zip。
     
     :param root_dir: 要壓縮的來源目錄
     :param output_zip: 輸出 zip 檔案完整路徑（例如 "D:/output.zip"）
-    :param compression_level: 壓縮等級 (0~9)
-    :param exclude_patterns: 要排除的檔案或目錄模式清單（例如 [".git", "*.tmp"]）
+    :param exclude_dirs: 要排除的目錄名稱模式清單
+    :param exclude_files: 要排除的檔案名稱模式清單
+    :param level: 壓縮等級 (0~9)
+    :param include_top_level: 若指定，root_dir 第一層只壓縮這些名稱的檔案或目錄
+    :param exclude_top_level: root_dir 第一層要略過的檔案或目錄名稱
+    :param append: 是否附加至既有的 output_zip
+    :param reuse_zip: 要沿用已壓縮資料的上次壓縮檔，預設為 output_zip
+    :return: 壓縮成功時回傳 True
     """
-    file_abs_paths, prefix_rel_paths = gather_files(root_dir, exclude_dirs, exclude_files)
-    if not file_abs_paths:
-        print("沒有檔案需要壓縮！")
-        return
-    for file, prefix in zip(file_abs_paths, prefix_rel_paths):
-        print(prefix, file)
-
+    append = append and os.path.isfile(output_zip)
+    # 附加模式直接寫入既有的 zip；否則寫入暫存檔，完成後再取代
+    temp_zip = output_zip if append else output_zip + ".tmp"
+    reuse_zip = reuse_zip or output_zip
+    old_files = {} if append else load_zip_manifest(reuse_zip, level)
+    old_zip = None
+    old_zip_file = None
     try:
         print(f"開始壓縮：{os.path.basename(output_zip)}")
-        pyminizip.compress_multiple(file_abs_paths, prefix_rel_paths, output_zip, None, 5)
+        if old_files:
+            old_zip = zipfile.ZipFile(reuse_zip, "r")
+            # 舊項目的原始資料以另一個一般檔案物件讀取，不經由 ZipFile 的內部檔案物件
+            old_zip_file = open(reuse_zip, "rb")
+        # 附加模式沿用既有 zip 的 manifest，再加入本次附加的檔案
+        files = dict(load_zip_manifest(output_zip, level)) if append else {}
+        reused = 0
+        compressed = 0
+        workers = os.cpu_count() or 1
+        # 待寫入的操作依序排入佇列：
+        #   ("entry", (zinfo, Future))：單一區段的小檔案，檔頭與資料一次寫入
+        #   ("raw", (zinfo, 舊項目))：沿用舊 zip 中已壓縮的資料
+        #   ("begin", (zinfo, 大小))、("data", 區段的 Future)、("end", 取得 CRC 的函式)：分段壓縮的大型檔案
+        # 限制佇列中尚未寫入的區段數量，避免大型檔案一次全部載入記憶體
+        events = deque()
+        in_flight = 0
+        # 輸出檔使用 4 MiB 寫入緩衝區，合併大量小檔案的檔頭與資料寫入，減少系統呼叫次數
+        with ThreadPoolExecutor(max_workers=workers) as executor, \
+                open(temp_zip, "r+b" if append else "wb", buffering=4 << 20) as out, \
+                zipfile.ZipFile(out, "a" if append else "w") as zf:
+            current = {}
+            raw_supported = raw_zip_supported(zf)
+            if not raw_supported:
+                print("目前的 zipfile 不支援寫入預先壓縮的資料，改為循序壓縮。")
+
+            def write_next():
+                nonlocal in_flight
+                kind, value = events.popleft()
+                if kind == "entry":
+                    zinfo, future = value
+                    data, crc = future.result()
+                    write_raw_entry(zf, zinfo, data, crc, zinfo.file_size)
+                    in_flight -= 1
+                elif kind == "raw":
+                    zinfo, old_info = value
+                    write_raw_entry(zf, zinfo, read_raw_entry(old_zip_file, old_info), old_info.CRC, old_info.file_size)
+                elif kind == "begin":
+                    zinfo, file_size = value
+                    current["zinfo"] = zinfo
+                    current["zip64"] = begin_raw_entry(zf, zinfo, file_size)
+                    current["compress_size"] = 0
+                elif kind == "data":
+                    data = value.result()[0]
+                    write_raw_data(zf, data)
+                    current["compress_size"] += len(data)
+                    in_flight -= 1
+                else:
+                    end_raw_entry(zf, current["zinfo"], value(), current["compress_size"], current["zip64"])
+
+            def submit(fn, *args):
+                nonlocal in_flight
+                while in_flight >= workers * 2:
+                    write_next()
+                in_flight += 1
+                return executor.submit(fn, *args)
+
+            for file, prefix, arcname in gather_files(root_dir, exclude_dirs, exclude_files, include_top_level, exclude_top_level):
+                print(prefix, file)
+                st = os.stat(file)
+                zinfo = zipinfo_from_stat(arcname, st)
+                key = [st.st_mtime_ns, st.st_size]
+                files[zinfo.filename] = key
+                if not raw_supported:
+                    zf.write(file, zinfo.filename, compress_type=zipfile.ZIP_DEFLATED, compresslevel=level)
+                    compressed += 1
+                    continue
+                old_info = None
+                if old_files.get(zinfo.filename) == key:
+                    try:
+                        old_info = old_zip.getinfo(zinfo.filename)
+                    except KeyError:
+                        old_info = None
+                    if old_info is not None and old_info.compress_type != zipfile.ZIP_DEFLATED:
+                        old_info = None
+                if old_info is not None:
+                    events.append(("raw", (zinfo, old_info)))
+                    reused += 1
+                    continue
+                compressed += 1
+                if st.st_size <= DEFLATE_CHUNK_SIZE:
+                    zinfo.file_size = st.st_size
+                    events.append(("entry", (zinfo, submit(deflate_chunk, file, 0, st.st_size, level, True))))
+                else:
+                    # 大型檔案的 CRC 需涵蓋整個檔案，另外交由一個執行緒循序計算
+                    crc_future = executor.submit(crc32_file, file, st.st_size)
+                    events.append(("begin", (zinfo, st.st_size)))
+                    for offset in range(0, st.st_size, DEFLATE_CHUNK_SIZE):
+                        length = min(DEFLATE_CHUNK_SIZE, st.st_size - offset)
+                        final = offset + length >= st.st_size
+                        events.append(("data", submit(deflate_chunk, file, offset, length, level, final)))
+                    events.append(("end", crc_future.result))
+            while events:
+                write_next()
+        if old_zip is not None:
+            old_zip.close()
+            old_zip = None
+            old_zip_file.close()
+            old_zip_file = None
+        if not files:
+            os.remove(temp_zip)
+            print("沒有檔案需要壓縮！")
+            return False
+        if not append:
+            os.replace(temp_zip, output_zip)
+        with open(output_zip + ".manifest.json", "w", encoding="utf-8") as f:
+            json.dump({"level": level, "files": files}, f)
+        if reused:
+            print(f"沿用上次壓縮結果 {reused} 個檔案，重新壓縮 {compressed} 個檔案。")
         print(f"壓縮成功，輸出檔案：{output_zip}")
+        return True
+    except Exception as e:
+        print("壓縮失敗：", e)
+        if not append and os.path.exists(temp_zip):
+            os.remove(temp_zip)
+        # 沿用舊資料時失敗（例如舊壓縮檔的項目資料損毀），捨棄 manifest，下次打包改為全部重新壓縮
+        if old_files:
+            discard_zip_manifest(reuse_zip)
+        return False
+    finally:
+        if old_zip is not None:
+            old_zip.close()
+        if old_zip_file is not None:
+            old_zip_file.close()
+
+def remove_zip_with_manifest(output_zip):
+    """
+    刪除 output_zip 與其 manifest（不存在則略過），用於捨棄未完成的暫存壓縮檔。
+    """
+    for path in (output_zip, output_zip + ".manifest.json"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def promote_zip(staging_zip, output_zip):
+    """
+    將暫存名稱的壓縮檔與其 manifest 改名為正式的 output_zip。
+    """
+    os.replace(staging_zip, output_zip)
+    os.replace(staging_zip + ".manifest.json", output_zip + ".manifest.json")
+
+def compress_directory_zstd(root_dir, output_path, exclude_dirs=None, exclude_files=None, level=15, exclude_top_level=None):
+    """
+    利用 zstandard 多執行緒壓縮，將 root_dir 目錄下（排除指定檔案/目錄後）的檔案打包成 tar.zst。
+    
+    :param root_dir: 要壓縮的來源目錄
+    :param output_path: 輸出 tar.zst 檔案完整路徑（例如 "D:/output.tar.zst"）
+    :param exclude_dirs: 要排除的目錄名稱模式清單
+    :param exclude_files: 要排除的檔案名稱模式清單
+    :param level: zstd 壓縮等級，預設 15（壓縮率與速度的平衡點）
+    :param exclude_top_level: root_dir 第一層要略過的檔案或目錄名稱
+    """
+    # 若要輸出 tar.zst 壓縮檔，需要 zstandard 模組
+    zstandard = import_optional("zstandard")
+    if zstandard is None:
+        sys.exit("無 zstandard 模組，無法輸出 tar.zst 壓縮檔。")
+
+    try:
+        print(f"開始壓縮：{os.path.basename(output_path)}")
+        count = 0
+        # threads=-1 表示使用所有 CPU 核心進行壓縮
+        cctx = zstandard.ZstdCompressor(level=level, threads=-1)
+        with open(output_path, "wb") as f:
+            with cctx.stream_writer(f) as stream:
+                with tarfile.open(fileobj=stream, mode="w|") as tar:
+                    # 同類型檔案相鄰排列，提升整體連續壓縮的壓縮率
+                    for file, prefix, arcname in gather_files_grouped(root_dir, exclude_dirs, exclude_files, exclude_top_level):
+                        print(arcname)
+                        tar.add(file, arcname=arcname, recursive=False)
+                        count += 1
+        if count == 0:
+            os.remove(output_path)
+            print("沒有檔案需要壓縮！")
+            return
+        print(f"壓縮成功，輸出檔案：{output_path}")
     except Exception as e:
         print("壓縮失敗：", e)
 
+def compress_directory_7z(root_dir, output_path, exclude_dirs=None, exclude_files=None, preset=6, exclude_top_level=None):
+    """
+    利用 py7zr 的 LZMA2 filter，將 root_dir 目錄下（排除指定檔案/目錄後）的檔案打包成 7z。
+    讀取緩衝區調高至 1 MiB，減少大檔案壓縮時的讀取次數。
+    
+    :param root_dir: 要壓縮的來源目錄
+    :param output_path: 輸出 7z 檔案完整路徑（例如 "D:/output.7z"）
+    :param exclude_dirs: 要排除的目錄名稱模式清單
+    :param exclude_files: 要排除的檔案名稱模式清單
+    :param preset: LZMA2 壓縮預設等級 (0~9)
+    :param exclude_top_level: root_dir 第一層要略過的檔案或目錄名稱
+    """
+    # 若要輸出 7z 壓縮檔，需要 py7zr 模組
+    py7zr = import_optional("py7zr")
+    if py7zr is None:
+        sys.exit("無 py7zr 模組，無法輸出 7z 壓縮檔。")
+
+    try:
+        print(f"開始壓縮：{os.path.basename(output_path)}")
+        count = 0
+        filters = [{"id": py7zr.FILTER_LZMA2, "preset": preset}]
+        with py7zr.SevenZipFile(output_path, "w", filters=filters, blocksize=1 << 20) as archive:
+            for file, prefix, arcname in gather_files_grouped(root_dir, exclude_dirs, exclude_files, exclude_top_level):
+                print(arcname)
+                archive.write(file, arcname=arcname)
+                count += 1
+        if count == 0:
+            os.remove(output_path)
+            print("沒有檔案需要壓縮！")
+            return
+        print(f"壓縮成功，輸出檔案：{output_path}")
+    except Exception as e:
+        print("壓縮失敗：", e)
+
+def select_archive_format(archive_format):
+    """
+    依設定的 archive_format 與目前環境可用的壓縮模組，決定實際輸出的壓縮格式。
+    auto 代表優先使用 zstandard 多執行緒壓縮（tar.zst）；指定的格式缺少對應模組時，
+    退回不需額外模組、同樣以多執行緒壓縮的 zip。
+    """
+    if archive_format == "auto":
+        return "tar.zst" if is_module_available("zstandard") else "zip"
+    if archive_format == "tar.zst" and not is_module_available("zstandard"):
+        print("無 zstandard 模組，改為輸出 zip 壓縮檔。")
+        return "zip"
+    if archive_format == "7z" and not is_module_available("py7zr"):
+        print("無 py7zr 模組，改為輸出 zip 壓縮檔。")
+        return "zip"
+    if archive_format not in ("tar.zst", "7z", "zip"):
+        print(f"不支援的壓縮格式 {archive_format}，改為輸出 zip 壓縮檔。")
+        return "zip"
+    return archive_format
+
 # -------------------------------
 # 主流程
 # -------------------------------
@@ -183,20 +662,75 @@ def main():
     # 載入 build.yml 設定檔
     build_config = load_build_config()
 
+    # 壓縮格式、等級與排除模式於建置開始前即決定
+    archive_format = select_archive_format(build_config['release'].get('archive_format', 'zip'))
+    compression_tier = build_config['release'].get('compression_tier', 'balanced')
+    if compression_tier not in COMPRESSION_TIERS:
+        sys.exit(f"不支援的 compression_tier：{compression_tier}（可用值：{'、'.join(COMPRESSION_TIERS)}）")
+    level = COMPRESSION_TIERS[compression_tier][archive_format]
+    output_path = os.path.join(workspace, f"{build_config['release']['name']}-{build_config['release']['version']}.{archive_format}")
+    # 排除模式於載入設定後即固定為 tuple，後續遍歷與樣式編譯快取皆直接使用
+    exclude_dirs = tuple(build_config['release']['exclude_dirs'])
+    # 排除先前（及本次）建置輸出的壓縮檔與其 manifest、暫存檔，避免壓縮檔被打包進自己
+    exclude_files = tuple(build_config['release']['exclude_files']) + (f"{build_config['release']['name']}-*",)
+
     # 1. 執行 download.py 並傳入 --workspace
     run_download_py(workspace, scripts_dir)
+
+    # zip 格式可附加項目：下載完成後，workspace 中除建置產物以外的內容已不會再變動，
+    # 因此在背景先行壓縮，與後續 pyinstaller 打包同時進行，最後再附加建置產物。
+    # 背景壓縮先寫入暫存名稱（<輸出檔>.static），附加成功後才改名為正式輸出檔，
+    # 建置失敗時不會留下缺少 scripts 與執行檔、看似完整的發布檔
+    static_future = None
+    static_executor = None
+    staging_path = output_path + ".static"
+    if archive_format == "zip":
+        static_executor = ThreadPoolExecutor(max_workers=1)
+        static_future = static_executor.submit(
+            compress_directory, workspace, staging_path,
+            exclude_dirs=exclude_dirs, exclude_files=exclude_files, level=level,
+            exclude_top_level=BUILD_PRODUCTS + DEVELOPMENT_ONLY, reuse_zip=output_path
+        )
+
+    try:
+        # 2. 利用 pyinstaller 同時打包 install.py、workspace.py 與 uninstall.py 為單一執行檔
+        build_executables(scripts_dir)
+        
+        # 3. 將 scripts/dist 底下的 .exe 移動到 workspace 目錄，並刪除 dist 目錄
+        move_exes_to_workspace(scripts_dir, workspace)
+        
+        # 4. 刪除 scripts 目錄下除了 *.py 與 *.yml 以外的其他檔案與目錄
+        clean_scripts_directory(scripts_dir)
+    except BaseException:
+        # 建置步驟失敗（含 sys.exit）時，等待背景壓縮結束後刪除暫存壓縮檔
+        if static_executor is not None:
+            static_executor.shutdown()
+            remove_zip_with_manifest(staging_path)
+        raise
     
-    # 2. 利用 pyinstaller 分別打包 install.py、workspace.py 與 uninstall.py 為單一執行檔
-    build_executables(scripts_dir)
-    
-    # 3. 將 scripts/dist 底下的 .exe 複製到 workspace 目錄
-    copy_exes_to_workspace(scripts_dir, workspace)
-    
-    # 4. 刪除 scripts 目錄下除了 *.py 與 *.yml 以外的其他檔案與目錄
-    clean_scripts_directory(scripts_dir)
-    
-    # 5. 將 workspace 目錄下的所有檔案與子目錄打包成壓縮檔
-    compress_directory(workspace, os.path.join(workspace, f"{build_config['release']['name']}-{build_config['release']['version']}.zip"), exclude_dirs=build_config['release']['exclude_dirs'], exclude_files=build_config['release']['exclude_files'])
+    # 5. 將 workspace 目錄下的所有檔案與子目錄打包成壓縮檔（依 archive_format 決定格式，預設 zip）
+    if static_future is not None:
+        # 等待背景壓縮完成後，附加 scripts 目錄與打包出的執行檔；背景壓縮未成功時改為完整重新壓縮
+        static_ok = static_future.result()
+        static_executor.shutdown()
+        if static_ok:
+            ok = compress_directory(workspace, staging_path, exclude_dirs=exclude_dirs, exclude_files=exclude_files, level=level,
+                                    include_top_level=BUILD_PRODUCTS, append=True)
+            if ok:
+                promote_zip(staging_path, output_path)
+                print(f"發布檔：{output_path}")
+        else:
+            ok = compress_directory(workspace, output_path, exclude_dirs=exclude_dirs, exclude_files=exclude_files, level=level,
+                                    exclude_top_level=DEVELOPMENT_ONLY)
+        remove_zip_with_manifest(staging_path)
+        if not ok:
+            sys.exit(f"打包 {os.path.basename(output_path)} 失敗，請確認錯誤訊息。")
+    elif archive_format == "tar.zst":
+        compress_directory_zstd(workspace, output_path, exclude_dirs=exclude_dirs, exclude_files=exclude_files, level=level,
+                                exclude_top_level=DEVELOPMENT_ONLY)
+    elif archive_format == "7z":
+        compress_directory_7z(workspace, output_path, exclude_dirs=exclude_dirs, exclude_files=exclude_files, preset=level,
+                              exclude_top_level=DEVELOPMENT_ONLY)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
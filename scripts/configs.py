@@ -11,6 +11,8 @@ IBM VSCode for Z Development Environment Setup Script
 3. 載入 init.yml 設定檔，並回傳初始化資訊。
 4. 載入 extensions.yml 設定檔，並回傳擴充功能包資訊。
 5. 載入 build.yml 設定檔，並回傳建置資訊。
+6. 解析結果另存為同目錄的 .json.cache 快取檔（記錄設定檔的修改時間與大小），設定檔未變動時直接以 json 載入，省去 YAML 解析。
+7. 各設定檔於同一行程中只解析一次，load_*_config 回傳快取資料的複本，呼叫端修改回傳值不會影響其他呼叫端。
 
 更新記錄:
 - v2.6.0: 優化設定檔載入邏輯，改善配置管理
@@ -22,60 +24,94 @@ IBM VSCode for Z Development Environment Setup Script
 
 import os
 import sys
-import yaml
+import copy
+import json
+from functools import lru_cache
 from utils.path_utils import get_script_dir
 
+# 設定檔所在目錄，於模組載入時計算一次
+CONFIG_DIR = os.path.join(get_script_dir(), "configs")
+
+# 解析後的設定檔快取副檔名，例如 tools.yml 的快取檔為 tools.yml.json.cache
+CONFIG_CACHE_SUFFIX = ".json.cache"
+
+def load_yaml_config(yml_path):
+    """
+    載入 YAML 設定檔並回傳內容。
+    快取檔（yml_path + CONFIG_CACHE_SUFFIX）記錄產生時設定檔的 st_mtime_ns 與 st_size，兩者與目前的設定檔完全相同時直接以 json 載入；
+    不以「快取較新」判斷，FAT 或 zip 的粗略時間戳記、保留修改時間的解壓，都不會讓已修改的設定檔誤用舊的快取。
+    否則解析 YAML，並將結果以暫存檔加 os.replace 的方式寫入快取檔。
+    內容無法以 JSON 無損表示（例如日期、非字串鍵值）或快取檔無法寫入時，僅回傳解析結果，不寫快取。
+    """
+    try:
+        yml_stat = os.stat(yml_path)
+    except OSError:
+        sys.exit(f"找不到設定檔: {yml_path}")
+    cache_path = yml_path + CONFIG_CACHE_SUFFIX
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if (isinstance(cache, dict) and cache.get("mtime_ns") == yml_stat.st_mtime_ns
+                and cache.get("size") == yml_stat.st_size and "config" in cache):
+            return cache["config"]
+    except (OSError, ValueError):
+        pass
+    # 快取命中時完全不需要 yaml，因此到需要解析時才載入；
+    # 優先使用 libyaml 實作的 CSafeLoader 加快解析速度，未編譯 libyaml 的環境則退回純 Python 的 SafeLoader
+    import yaml
+    yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(yml_path, "r", encoding="utf-8") as f:
+        config = yaml.load(f, Loader=yaml_loader)
+    try:
+        cache_text = json.dumps({
+            "mtime_ns": yml_stat.st_mtime_ns,
+            "size": yml_stat.st_size,
+            "config": config
+        }, ensure_ascii=False)
+        if json.loads(cache_text)["config"] == config:
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(cache_text)
+            os.replace(temp_path, cache_path)
+    except (TypeError, ValueError, OSError):
+        pass
+    return config
+
+@lru_cache(maxsize=None)
+def load_cached_config(file_name):
+    """
+    載入 CONFIG_DIR 中的 file_name 設定檔。設定檔在單次執行中不會變動，解析結果以 lru_cache 依檔名記錄，
+    整個行程中只讀檔與解析一次（之後設定檔被修改也不會重新讀取，需重新讀取時可呼叫 load_cached_config.cache_clear()）。
+    回傳的是共用的快取資料，請改用各 load_*_config 取得可自由修改的複本。
+    """
+    return load_yaml_config(os.path.join(CONFIG_DIR, file_name))
+
 def load_tools_config():
     """
-    載入 tools.yml 設定檔，並回傳工具包資訊。
+    載入 tools.yml 設定檔，並回傳工具包資訊（快取資料的複本）。
     """
-    tools_yml_path = os.path.join(get_script_dir(), "configs", "tools.yml")
-    if not os.path.exists(tools_yml_path):
-        sys.exit(f"找不到設定檔: {tools_yml_path}")
-    with open(tools_yml_path, "r", encoding="utf-8") as f:
-        tools = yaml.safe_load(f)
-    return tools
+    return copy.deepcopy(load_cached_config("tools.yml"))
 
 def load_pip_config():
     """
-    載入 pip.yml 設定檔，並回傳 pip 資訊。
+    載入 pip.yml 設定檔，並回傳 pip 資訊（快取資料的複本）。
     """
-    pip_yml_path = os.path.join(get_script_dir(), "configs", "pip.yml")
-    if not os.path.exists(pip_yml_path):
-        sys.exit(f"找不到設定檔: {pip_yml_path}")
-    with open(pip_yml_path, "r", encoding="utf-8") as f:
-        pip = yaml.safe_load(f)
-    return pip
+    return copy.deepcopy(load_cached_config("pip.yml"))
 
 def load_init_config():
     """
-    載入 init.yml 設定檔，並回傳初始化資訊。
+    載入 init.yml 設定檔，並回傳初始化資訊（快取資料的複本）。
     """
-    init_yml_path = os.path.join(get_script_dir(), "configs", "init.yml")
-    if not os.path.exists(init_yml_path):
-        sys.exit(f"找不到設定檔: {init_yml_path}")
-    with open(init_yml_path, "r", encoding="utf-8") as f:
-        init_config = yaml.safe_load(f)
-    return init_config
+    return copy.deepcopy(load_cached_config("init.yml"))
 
 def load_extensions_config():
     """
-    載入 extensions.yml 設定檔，並回傳擴充功能包資訊。
+    載入 extensions.yml 設定檔，並回傳擴充功能包資訊（快取資料的複本）。
     """
-    extensions_yml_path = os.path.join(get_script_dir(), "configs", "extensions.yml")
-    if not os.path.exists(extensions_yml_path):
-        sys.exit(f"找不到設定檔: {extensions_yml_path}")
-    with open(extensions_yml_path, "r", encoding="utf-8") as f:
-        extensions = yaml.safe_load(f)
-    return extensions
+    return copy.deepcopy(load_cached_config("extensions.yml"))
 
 def load_build_config():
     """
-    載入 build.yml 設定檔，並回傳設定資訊。
+    載入 build.yml 設定檔，並回傳設定資訊（快取資料的複本）。
     """
-    build_yml_path = os.path.join(get_script_dir(), "configs", "build.yml")
-    if not os.path.exists(build_yml_path):
-        sys.exit(f"找不到設定檔: {build_yml_path}")
-    with open(build_yml_path, "r", encoding="utf-8") as f:
-        build_config = yaml.safe_load(f)
-    return build_config
\ No newline at end of file
+    return copy.deepcopy(load_cached_config("build.yml"))
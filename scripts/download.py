@@ -22,15 +22,20 @@ IBM VSCode for Z Development Environment Setup Script
 """
 
 import os
+import sys
 import argparse
-import fnmatch
+import json
 from urllib.parse import urlparse
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from utils.file_utils import cleanup_directory_match
-from utils.path_utils import compose_folder_path, get_script_dir
+from utils.message_utils import safe_print
+from utils.path_utils import compile_patterns, compose_folder_path, get_script_dir
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 # 導入我們的設定檔工具模組
 from configs import (
@@ -39,6 +44,37 @@ from configs import (
     load_extensions_config
 )
 
+# 所有下載共用同一個 Session，重複使用連線（尤其是大量下載 marketplace.visualstudio.com 上的擴充功能），
+# 省去每個檔案重新建立 TCP 連線與 TLS 交握；連線失敗或伺服器暫時錯誤時自動重試
+SESSION = requests.Session()
+ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+)
+SESSION.mount("https://", ADAPTER)
+SESSION.mount("http://", ADAPTER)
+
+# 連線逾時與讀取逾時（秒）
+REQUEST_TIMEOUT = (5, 60)
+
+# 從 Content-Disposition 標頭取出檔名的正規表達式
+CONTENT_DISPOSITION_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+
+# 同時進行的下載數量
+DOWNLOAD_WORKERS = 8
+
+# 串流下載時每次寫入磁碟的區塊大小
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+# 下載紀錄（各來源 URL 的檔名、ETag、Last-Modified）統一存放於工作區下的快取目錄，
+# 不放在工具包目錄中，避免安裝時將紀錄檔當成解壓後的實體內容
+DOWNLOAD_CACHE_DIR = ".download_cache"
+DOWNLOAD_META_FILE = "downloads.meta.json"
+
+# 舊版存放於下載檔案旁的下載紀錄檔副檔名，下載完成後一併清除
+LEGACY_META_SUFFIX = ".meta.json"
+
 # -------------------------------
 #  功能函式
 # -------------------------------
@@ -52,48 +88,97 @@ def determine_filename(response, pattern, default_filename):
     # 優先順序 1：檢查 Content-Disposition
     content_disposition = response.headers.get("Content-Disposition", "")
     if content_disposition:
-        match = re.search(r'filename="?([^";]+)"?', content_disposition)
+        match = CONTENT_DISPOSITION_FILENAME_RE.search(content_disposition)
         if match:
             filename = match.group(1)
-            print(f"根據 Content-Disposition 取得檔名：{filename}")
+            safe_print(f"根據 Content-Disposition 取得檔名：{filename}")
             return filename
     
     # 優先順序 2：根據 response.url 取得最後部分檔名，並檢查是否符合 pattern
     parsed = urlparse(response.url)
     tail_filename = os.path.basename(parsed.path)
-    if tail_filename and fnmatch.fnmatch(tail_filename, pattern):
-        print(f"根據連結尾端檔名符合 pattern，取得檔名：{tail_filename}")
+    # compile_patterns 會快取編譯結果，相同的 pattern 只需編譯一次
+    if tail_filename and compile_patterns((pattern,))(tail_filename):
+        safe_print(f"根據連結尾端檔名符合 pattern，取得檔名：{tail_filename}")
         return tail_filename
 
     # 優先順序 3：回傳根據 pattern 與 version 組合出的預設檔名
-    print(f"使用預設規則產生檔名：{default_filename}")
+    safe_print(f"使用預設規則產生檔名：{default_filename}")
     return default_filename
 
-def download_file(url, dest_directory, filename_pattern, default_filename=""):
+def load_download_cache(meta_path):
+    """
+    讀取下載紀錄檔 meta_path，回傳 {url: meta}，meta 記錄下載的檔名（filename）與伺服器回傳的 ETag、Last-Modified。
+    紀錄檔不存在或無法解析時回傳空 dict。
+    """
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_download_cache(meta_path, cache):
+    """
+    將 {url: meta} 寫入下載紀錄檔 meta_path；先寫入暫存檔再以 os.replace 取代，中斷時不會留下不完整的紀錄檔。
+    """
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    temp_path = meta_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, meta_path)
+
+def download_file(url, dest_directory, filename_pattern, default_filename="", cached=None):
     """
     根據 URL 下載檔案，並根據 response header 中的 Content-Disposition 設定檔案名稱，
-    若找不到檔名則使用 URL 的最後一段作為檔案名稱。在儲存前若檔案已存在，則先刪除。
+    若找不到檔名則使用 URL 的最後一段作為檔案名稱。
+    下載內容以串流方式邊接收邊寫入磁碟，不會將整個檔案載入記憶體；
+    先寫入 <檔名>.part，下載完成後才以 os.replace 取代既有檔案，中斷時不會留下不完整的檔案。
+    cached 為上次下載的 meta（且對應檔案仍存在）時，以 If-None-Match / If-Modified-Since 進行條件式請求，
+    伺服器回應 304（未變更）則沿用既有檔案，不重新下載。
+    
+    :return: (下載或沿用的檔案名稱, 該檔案的 meta)，失敗時回傳 (None, None)
     """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
+        with SESSION.get(url, stream=True, timeout=REQUEST_TIMEOUT, headers=headers) as response:
+            if cached and response.status_code == 304:
+                safe_print(f"檔案未變更，沿用既有檔案：{os.path.join(dest_directory, cached['filename'])}")
+                return cached["filename"], cached
+            if response.status_code != 200:
+                safe_print(f"下載失敗：{url} (HTTP 狀態：{response.status_code})")
+                return None, None
             # 決定檔案名稱
             filename = determine_filename(response, filename_pattern, default_filename)
             # 組合下載目的地的完整路徑
             dest_path = os.path.join(dest_directory, filename)
+            part_path = dest_path + ".part"
             
-            # 如果檔案已存在，就先刪除
-            if os.path.exists(os.path.join(dest_directory, filename)):
-                os.remove(os.path.join(dest_directory, filename))
-            
-            # 寫入檔案
-            with open(dest_path, "wb") as f:
-                f.write(response.content)
-            print(f"下載成功，檔案已儲存為: {dest_path}")
-        else:
-            print(f"下載失敗：{url} (HTTP 狀態：{response.status_code})")
+            # 寫入暫存檔，完成後再取代目的檔案（既有檔案會直接被覆蓋）
+            try:
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(part_path, dest_path)
+            except BaseException:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+            safe_print(f"下載成功，檔案已儲存為: {dest_path}")
+            # 回傳伺服器的驗證資訊，由主流程統一寫入下載紀錄，供下次條件式請求使用
+            return filename, {
+                "filename": filename,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
     except Exception as e:
-        print(f"下載過程中發生錯誤：{e}")
+        safe_print(f"下載過程中發生錯誤：{e}")
+        return None, None
 
 # -------------------------------
 # 主流程
@@ -120,8 +205,13 @@ def main():
     # 載入 pip.yml 設定檔
     pip = load_pip_config()
         
-    # 根據設定檔逐一下載 vsix 檔案
-    cleanup_directory_match(os.path.join(workspace, "extensions"), "*.vsix")
+    # 下載工作清單：(url, dest_directory, filename_pattern, default_filename, cleanup_pattern)
+    # 舊檔案不再於下載前全部刪除，而是在下載完成後，只清除本次未下載也未沿用的檔案
+    jobs = []
+    extensions_dir = os.path.join(workspace, "extensions")
+    pywhls_dir = os.path.join(workspace, "pywhls")
+
+    # 根據設定檔整理要下載的 vsix 檔案
     for publisher, ext_list in extensions.items():
         for ext_dict in ext_list:
             # 這裡假設每個元素都是只有一筆 {extension: version} 的字典
@@ -131,27 +221,75 @@ def main():
                     f"https://marketplace.visualstudio.com/_apis/public/gallery/publishers/"
                     f"{publisher}/vsextensions/{ext_name}/{version}/vspackage"
                 )
-                print(f"開始下載：{url}")
                 # 產生檔案名稱，例如 ibm.zopendebug-5.4.0.vsix
                 file_name = f"{publisher}.{ext_name}-{version}.vsix"
-                download_file(url, os.path.join(workspace, "extensions"), "*.vsix", file_name)
-    
-    # 下載 pip 套件
-    cleanup_directory_match(os.path.join(workspace, "pywhls"), "*.whl")
-    subprocess.run(["pip", "download", *(pip["whls"]), "--dest", os.path.join(workspace, "pywhls")])
+                jobs.append((url, extensions_dir, "*.vsix", file_name, "*.vsix"))
 
-    # 針對每個有連結設定的工具進行下載
+    # 針對每個有連結設定的工具整理下載工作
     for tool, config in tools.items():
-        print(f"\n下載工具：{tool}")
         link = config["source"]
-        print(f"開始下載：{link}")
         # 設定預設檔名 (若無法從下載連結決定)，例如 "python_3.13.3.0.zip"
         filename_pattern = f"{config['pattern']}.{config['type']}"
         default_filename = filename_pattern.replace('*', '')
         # 將 dir 拆解後用 os.path.join 組合
         dest_directory = compose_folder_path(workspace, config["dir"])
-        cleanup_directory_match(dest_directory, f"*.{config['type']}")
-        download_file(link, dest_directory, filename_pattern, default_filename)
+        jobs.append((link, dest_directory, filename_pattern, default_filename, f"*.{config['type']}"))
+
+    # 讀取上次下載留下的紀錄；只沿用對應檔案仍存在於目的目錄中的紀錄
+    meta_path = os.path.join(workspace, DOWNLOAD_CACHE_DIR, DOWNLOAD_META_FILE)
+    download_cache = load_download_cache(meta_path)
+    cached_metas = []
+    for job in jobs:
+        meta = download_cache.get(job[0])
+        if not (isinstance(meta, dict) and meta.get("filename")
+                and os.path.isfile(os.path.join(job[1], meta["filename"]))):
+            meta = None
+        cached_metas.append(meta)
+
+    # 下載 pip 套件：以目前的 Python 執行 pip，於背景子行程進行，與下方的擴充功能及工具下載同時進行
+    # --prefer-binary 優先選用已編譯的 wheel，避免下載原始碼套件後還需建置
+    cleanup_directory_match(pywhls_dir, "*.whl")
+    pip_process = subprocess.Popen([
+        sys.executable, "-m", "pip", "download", "--prefer-binary",
+        *(pip["whls"]), "--dest", pywhls_dir
+    ])
+
+    # 下載皆為等待網路的 I/O 工作，交由執行緒池同時下載
+    def run_job(job, cached):
+        url, dest_directory, filename_pattern, default_filename = job[:4]
+        safe_print(f"開始下載：{url}")
+        return download_file(url, dest_directory, filename_pattern, default_filename, cached)
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        results = list(executor.map(run_job, jobs, cached_metas))
+
+    SESSION.close()
+
+    # 清除各目錄中本次未下載也未沿用的舊檔案，並重新寫入下載紀錄（只保留仍存在檔案的紀錄）
+    # 下載失敗的項目保留上次下載的檔案（或已存在的預設檔名，例如 ibm.zopendebug-5.4.0.vsix），避免因網路問題失去可用的舊檔
+    keep_files = {}
+    new_cache = {}
+    for job, (filename, meta), cached in zip(jobs, results, cached_metas):
+        url, dest_directory, _, default_filename, cleanup_pattern = job
+        keep = keep_files.setdefault((dest_directory, cleanup_pattern), set())
+        if filename:
+            keep.add(filename)
+            new_cache[url] = meta
+            continue
+        if cached:
+            keep.add(cached["filename"])
+            new_cache[url] = cached
+        elif default_filename and os.path.isfile(os.path.join(dest_directory, default_filename)):
+            keep.add(default_filename)
+    for (dest_directory, cleanup_pattern), keep in keep_files.items():
+        cleanup_directory_match(dest_directory, cleanup_pattern, keep=keep)
+        # 中斷的下載留下的 .part 暫存檔與舊版的下載紀錄檔都不屬於工具包內容，一併清除，避免安裝時被視為實體內容
+        cleanup_directory_match(dest_directory, "*.part")
+        cleanup_directory_match(dest_directory, f"*{LEGACY_META_SUFFIX}")
+    save_download_cache(meta_path, new_cache)
+
+    if pip_process.wait() != 0:
+        print(f"pip 套件下載失敗 (結束代碼：{pip_process.returncode})")
 
 if __name__ == "__main__":
     main()
@@ -8,14 +8,14 @@ IBM VSCode for Z Development Environment Setup Script
 說明:
 1. 於各指定資料夾中尋找符合條件的 Zip 檔（依修改時間排序取最新檔案）。
 2. 驗證工具（VSCode、Jdk21 等）的檔案是否存在，若不存在則顯示錯誤後結束程式。
-3. 執行解壓動作，各工具的 Zip 檔解壓到相應目錄中；若產生嵌套資料夾則將其中內容搬移上層後刪除該空目錄。
+3. 執行解壓動作，各工具的 Zip 檔（以行程池同時進行）解壓到相應目錄中；若產生嵌套資料夾則將其中內容搬移上層後刪除該空目錄。
 4. 安裝 Zowe-Cli Core 模組
 5. 安裝 Zowe-Cli Plugin 模組
 6. 建立 python venv 虛擬環境
 7. 安裝 python 套件包
 8. 根據目前工作區（即腳本所在路徑）修改設定檔中的路徑參數（含轉義與 URI 部分）。
-9. 安裝 VSCode 擴充功能包（包含檔案鎖定處理機制）
-10. 建立 VSCode 的 Windows 快捷方式（若無 win32com 則略過）。
+9. 安裝 VSCode 擴充功能包（多個擴充功能包合併為一次 VSCode CLI 呼叫，包含檔案鎖定處理機制）
+10. 建立 VSCode 的 Windows 快捷方式（直接寫出 .lnk 檔，失敗時改用 win32com）。
 
 更新記錄:
 - v2.6.0: 優化檔案鎖定檢測和進程終止功能，改善安裝和卸載流程
@@ -27,20 +27,19 @@ IBM VSCode for Z Development Environment Setup Script
 
 import os
 import argparse
+import contextlib
+import io
+import multiprocessing
 import re
 import json
 import subprocess
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import quote
 from utils.path_utils import compose_folder_path, escape_backslashes, get_script_dir
-from utils.file_utils import safe_rmtree, replace_in_file
-
-# 若要建立 Windows 快捷方式，需要 pywin32 模組
-try:
-    import win32com.client
-except ImportError:
-    win32com = None
+from utils.file_utils import safe_rmtree, replace_many_in_file
 
 # 導入我們的互動工具模組
 from utils.message_utils import (
@@ -54,15 +53,21 @@ from utils.path_utils import (
     get_all_files_reversed_sorted,
     find_real_directory,
     find_home_path,
+    find_home_paths,
+    remember_home_paths,
     find_target_file_path,
     find_target_file_path_by_pattern
 )
 # 導入我們的檔案工具模組
 from utils.file_utils import (
-    extract_zip_with_spinner,
+    spinner,
+    extract_zip,
+    ZIP_EXTRACT_MAX_WORKERS,
     copy_contents_to_with_spinner,
     move_contents_up
 )
+# 導入我們的捷徑工具模組
+from utils.shortcut_utils import write_shortcut
 # 導入我們的設定檔工具模組
 from configs import (
     load_tools_config,
@@ -71,6 +76,19 @@ from configs import (
     load_extensions_config
 )
 
+# code.cmd 經由 cmd.exe 執行，命令列長度上限為 8191 個字元；合併安裝擴充功能包時每批次的參數總長度保留餘裕不超過此值
+CODE_CMD_MAX_LENGTH = 8000
+
+# 預設同時執行的 VSCode CLI 安裝行程數：所有行程共用同一個 portable data/extensions 目錄與 extensions.json，
+# VSCode 不保證同時寫入安全，預設依序執行各批次（每批次已合併多個擴充功能包，啟動成本只需負擔一次）
+DEFAULT_INSTALL_CONCURRENCY = 1
+
+# VSCode 批次檔中的 'setlocal' 行（不分大小寫、允許前後空白），group(1) 為該行的換行字元
+SETLOCAL_LINE_RE = re.compile(rb"(?im)^[ \t]*setlocal[ \t]*(\r?\n|$)")
+
+# 工具名稱中的版本號序列，例如 'javaJDK11.0.18' 中的 '11.0.18'
+VERSION_RE = re.compile(r"\d+(?:\.\d+)*")
+
 # -------------------------------
 #  功能函式
 # -------------------------------
@@ -79,25 +97,77 @@ def extract_major_version(version_text):
     從 version_text 中擷取版本號序列，並僅回傳第一組（major 部分）。
     例如：'javaJDK11.0.18' 會回傳 '11'。
     """
-    match = re.search(r'\d+(?:\.\d+)*', version_text)
+    match = VERSION_RE.search(version_text)
     if match:
         full_version = match.group()
         return full_version.split(".")[0]
     return None
 
 def vscode_cmd_insertion(file_path, insertions):
-    """在 VSCode 的批次檔中讀取 'setlocal' 行後插入額外環境設定語法。"""
-    with open(file_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    new_lines = []
-    inserted = False
-    for line in lines:
-        new_lines.append(line)
-        if not inserted and line.strip().lower() == "setlocal":
-            new_lines.extend(insertions)
-            inserted = True
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.writelines(new_lines)
+    """
+    在 VSCode 的批次檔中讀取 'setlocal' 行後插入額外環境設定語法。
+    以位元組讀入整個檔案，用 SETLOCAL_LINE_RE 一次找出第一個 'setlocal' 行的結尾後，將設定語法接在該處一次寫回；
+    插入的每一行沿用該行的換行字元（CRLF 或 LF；該行沒有換行字元時依檔案其餘部分判斷），其餘內容原樣保留。
+    若批次檔中已含有全部相同的設定（例如重複執行安裝），則不再重複插入、也不重寫檔案。
+    回傳值：True 表示已插入；False 表示已有相同設定，未修改檔案；
+    None 表示找不到 'setlocal' 行，無法插入（未修改檔案），呼叫端須另行提示。
+    """
+    with open(file_path, "r+b") as f:
+        content = f.read()
+        existing = set(content.replace(b"\r\n", b"\n").split(b"\n"))
+        if all(insertion.rstrip("\n").encode("utf-8") in existing for insertion in insertions):
+            return False
+        match = SETLOCAL_LINE_RE.search(content)
+        if not match:
+            return None
+        newline = match.group(1) or (b"\n" if b"\n" in content and b"\r\n" not in content else b"\r\n")
+        inserted = b"".join(insertion.rstrip("\n").encode("utf-8") + newline for insertion in insertions)
+        if not match.group(1):
+            # 'setlocal' 為最後一行且沒有換行字元時，先補上換行
+            inserted = newline + inserted
+        f.seek(match.end())
+        f.write(inserted + content[match.end():])
+    return True
+
+def extract_zip_job(zip_path, dest_dir, archive_ext, max_workers=None, home_path_of=()):
+    """
+    於子行程中解壓 zip 類型工具包，若產生嵌套資料夾則將其中內容搬移上層。
+    max_workers 為此工具包解壓時可用的執行緒數。
+    home_path_of 為之後需加入 PATH 的執行檔，趁剛解壓完成時走訪一次目錄找出其所在資料夾。
+    回傳 (搬移時的訊息（無則為空字串）, {小寫檔名: 所在資料夾})，由主行程統一輸出並記錄。
+    """
+    extract_zip(zip_path, dest_dir, max_workers=max_workers)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        move_contents_up(dest_dir, find_real_directory(dest_dir, archive_ext))
+    return output.getvalue().rstrip("\n"), find_home_paths(dest_dir, home_path_of)
+
+def extract_exe_job(exe_path, dest_dir):
+    """執行 exe 類型自解工具包並等待結束（於執行緒池中執行），回傳 (結束代碼, 錯誤輸出)，由主執行緒統一輸出。"""
+    result = subprocess.run(
+        [exe_path, "/S", "-y", f"-o{dest_dir}"],
+        text=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=dest_dir
+    )
+    return result.returncode, result.stderr
+
+def run_phase_captured(phase, *args, **kwargs):
+    """
+    於子行程中執行某個階段，並收集其間所有輸出（含 spinner），避免與前景階段的輸出交錯。
+    回傳 (輸出文字, 例外)；例外（含 sys.exit 的 SystemExit）交由主行程在印出輸出後重新拋出。
+    """
+    output = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(output):
+        try:
+            phase(*args, **kwargs)
+        except BaseException as e:
+            error = e
+    # spinner 以 \r 覆寫同一行，只保留每行最後呈現的內容
+    lines = [line.rsplit("\r", 1)[-1] for line in output.getvalue().split("\n")]
+    return "\n".join(lines), error
 
 # -------------------------------
 # 以下定義各階段流程（利用 decorator 包裝）
@@ -110,83 +180,127 @@ def phase1_check_tools(workspace, auto_continue=False):
     # 載入 tools.yml 設定檔
     tools = load_tools_config()
     
-    # 取得工具包檔案
+    # 取得工具包檔案；各工具的安裝目錄只在此組合一次，回傳供之後各階段共用
     tool_files = {}
+    resolved_dirs = {}
     for tool, info in tools.items():
-        tool_file = get_latest_file(compose_folder_path(workspace, info["dir"]), f"{info["pattern"]}.{info["type"]}")
+        resolved_dirs[tool] = compose_folder_path(workspace, info["dir"])
+        tool_file = get_latest_file(resolved_dirs[tool], f"{info["pattern"]}.{info["type"]}")
         tool_files[tool] = tool_file
         print(f"{tool}：{tool_file}")
         if tool_file == "":
             print(f"{tool} 不存在，請確認後再執行。")
             sys.exit(1)
     print("檢查工具包完成。\n")
-    return tools, tool_files
+    return tools, tool_files, resolved_dirs
 
 @confirm_step("【步驟 2】解壓工具包：請確認解壓前準備")
-def phase2_extract_packages(tools, tool_files, workspace, auto_continue=False):
-    # 解壓縮 zip 類型工具包
+def phase2_extract_packages(tools, resolved_dirs, tool_files, workspace, auto_continue=False):
+    # 各工具包解壓至不同目錄、彼此獨立：zip 工具包的解壓需要 CPU，交由行程池同時解壓；
+    # exe 自解工具包只需等待子行程結束，交由執行緒池與 zip 工具包同時進行
+    # 每個 zip 工具包內部也以執行緒平行解壓，依工具包數量平分 CPU，避免執行緒總數遠超過 CPU 數
+    zip_count = sum(1 for info in tools.values() if info["type"] == "zip")
+    threads_per_zip = max(1, min(ZIP_EXTRACT_MAX_WORKERS, (os.cpu_count() or 1) // max(1, zip_count)))
+    jobs = {}
     for tool, info in tools.items():
+        dest_dir = resolved_dirs[tool]
+        file_path = os.path.join(dest_dir, tool_files[tool])
         if info["type"] == "zip":
-            dest_dir = compose_folder_path(workspace, info["dir"])
-            zip_path = os.path.join(dest_dir, tool_files[tool])
-            extract_zip_with_spinner(zip_path, dest_dir)
-            move_contents_up(dest_dir, find_real_directory(dest_dir, f".{info['type']}"))
-    
-    # 解壓縮 exe 類型自解工具包
-    for tool, info in tools.items():
-        if info["type"] == "exe":
-            dest_dir = compose_folder_path(workspace, info["dir"])
-            exe_path = os.path.join(dest_dir, tool_files[tool])
-            try:
-                run_with_spinner(
-                    [exe_path, "/S", "-y", f"-o{dest_dir}"],
-                    f"解壓縮 {tool}",
-                    cwd=dest_dir
-                )
-            except subprocess.CalledProcessError as e:
-                print(f"解壓縮 {tool} 失敗，錯誤代碼：{e.returncode}")
-                if e.stderr:
-                    print(f"錯誤訊息：{e.stderr}")
+            jobs[tool] = (extract_zip_job, file_path, dest_dir, f".{info['type']}", threads_per_zip,
+                tuple(info.get("home_path_of") or ()) if info.get("add_home_path_to_env") else ())
+        elif info["type"] == "exe":
+            jobs[tool] = (extract_exe_job, file_path, dest_dir)
+
+    results = {}
+    stop_event = threading.Event()
+    spinner_thread = threading.Thread(
+        target=spinner,
+        args=(
+            stop_event,
+            f"開始解壓縮：{', '.join(jobs)}",
+            "解壓縮中",
+            "解壓縮完成"
+        )
+    )
+    spinner_thread.start()
+    try:
+        zip_tools = [tool for tool in jobs if tools[tool]["type"] == "zip"]
+        exe_tools = [tool for tool in jobs if tools[tool]["type"] == "exe"]
+        with ProcessPoolExecutor(max_workers=max(1, min(len(zip_tools), os.cpu_count() or 1))) as process_executor, \
+                ThreadPoolExecutor(max_workers=max(1, len(exe_tools))) as thread_executor:
+            futures = {process_executor.submit(*jobs[tool]): tool for tool in zip_tools}
+            futures.update({thread_executor.submit(*jobs[tool]): tool for tool in exe_tools})
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    finally:
+        stop_event.set()
+        spinner_thread.join()
+
+    # 解壓期間的訊息待 spinner 結束後依原本的工具順序輸出
+    for tool in jobs:
+        if tools[tool]["type"] == "zip":
+            message, home_paths = results[tool]
+            # 子行程找到的執行檔所在資料夾記錄於本行程，之後的 find_home_path 不必再走訪目錄
+            remember_home_paths(resolved_dirs[tool], home_paths)
+            print(f"已解壓縮 {tool}：{jobs[tool][1]}")
+            if message:
+                print(message)
+        else:
+            returncode, stderr = results[tool]
+            if returncode != 0:
+                print(f"解壓縮 {tool} 失敗，錯誤代碼：{returncode}")
+                if stderr:
+                    print(f"錯誤訊息：{stderr}")
+            else:
+                print(f"已解壓縮 {tool}：{jobs[tool][1]}")
     
     # 取得 JAVA_HOME 相關路徑（取倒序排序第一個項目）
     java_versions = sorted([key for key in tools if key.startswith("java")], reverse=True)
-    java_home_path = compose_folder_path(workspace, tools[java_versions[0]]["dir"])
+    java_home_path = resolved_dirs[java_versions[0]]
     
     print("解壓工具包完成。\n")
     return java_home_path, java_versions
 
 @confirm_step("【步驟 3】安裝 Zowe-Cli：請確認安裝前設定")
-def phase3_install_zowe(tools, workspace, auto_continue=False):
-    # 安裝 Zowe-Cli Core 模組
-    zowe_core_modules = get_all_files_reversed_sorted(compose_folder_path(workspace, tools["zowe-core"]["dir"]), "*.tgz")
-    for zowe_module in zowe_core_modules:
-        print(f"準備安裝 {os.path.basename(zowe_module)}...")
-        try:
-            run_with_spinner(
-                [os.path.join(compose_folder_path(workspace, tools["nodejs"]["dir"]), "npm.cmd"),
-                    "install", "-g", "--prefer-offline", "--prefer-online",
-                    "--no-fund", "--no-audit", os.path.join(compose_folder_path(workspace, tools["zowe-core"]["dir"]), zowe_module)],
-                f"安裝 {os.path.basename(zowe_module)}",
-                cwd=compose_folder_path(workspace, tools["nodejs"]["dir"]),
-                timeout=600  # 10分鐘超時
-            )
-            print(f"安裝 {os.path.basename(zowe_module)} 完成。")
-        except subprocess.CalledProcessError as e:
-            print(f"安裝 {os.path.basename(zowe_module)} 失敗，錯誤代碼：{e.returncode}")
-            if e.stderr:
-                print(f"錯誤訊息：{e.stderr}")
-    
-    # 安裝 Zowe-Cli Plugin 模組
-    zowe_plugin_modules = get_all_files_reversed_sorted(compose_folder_path(workspace, tools["zowe-plugin"]["dir"]), "*.tgz")
-    for zowe_module in zowe_plugin_modules:
+def phase3_install_zowe(tools, resolved_dirs, workspace, auto_continue=False):
+    nodejs_dir = resolved_dirs["nodejs"]
+    # --prefer-offline 優先使用本機快取；--no-progress 省去進度列在主控台上的重繪
+    npm_install = [os.path.join(nodejs_dir, "npm.cmd"),
+        "install", "-g", "--prefer-offline", "--no-progress",
+        "--no-fund", "--no-audit"]
+    # Zowe-Cli Core 模組在前、Plugin 模組在後
+    zowe_modules = (
+        get_all_files_reversed_sorted(resolved_dirs["zowe-core"], "*.tgz")
+        + get_all_files_reversed_sorted(resolved_dirs["zowe-plugin"], "*.tgz")
+    )
+    if not zowe_modules:
+        print("找不到 Zowe-Cli 模組，略過安裝。\n")
+        return
+
+    # 以單一 npm 指令一次安裝所有模組，只需啟動一次 Node 並共用相依套件的解析
+    print(f"準備安裝 {', '.join(os.path.basename(m) for m in zowe_modules)}...")
+    try:
+        run_with_spinner(
+            npm_install + zowe_modules,
+            "安裝 Zowe-Cli 模組",
+            cwd=nodejs_dir,
+            timeout=600 * len(zowe_modules)  # 每個模組 10分鐘超時
+        )
+        print("安裝 Zowe-Cli 模組完成。")
+        print("安裝 Zowe-Cli 完成。\n")
+        return
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        print("整批安裝失敗，改為逐一安裝各模組。")
+
+    # 整批安裝失敗時逐一安裝，讓個別模組的失敗不影響其他模組
+    # （全域安裝共用同一個 node_modules，同時執行多個 npm 會互相干擾，因此維持依序安裝）
+    for zowe_module in zowe_modules:
         print(f"準備安裝 {os.path.basename(zowe_module)}...")
         try:
             run_with_spinner(
-                [os.path.join(compose_folder_path(workspace, tools["nodejs"]["dir"]), "npm.cmd"),
-                    "install", "-g", "--prefer-offline", "--prefer-online",
-                    "--no-fund", "--no-audit", os.path.join(compose_folder_path(workspace, tools["zowe-plugin"]["dir"]), zowe_module)],
+                npm_install + [zowe_module],
                 f"安裝 {os.path.basename(zowe_module)}",
-                cwd=compose_folder_path(workspace, tools["nodejs"]["dir"]),
+                cwd=nodejs_dir,
                 timeout=600  # 10分鐘超時
             )
             print(f"安裝 {os.path.basename(zowe_module)} 完成。")
@@ -197,13 +311,13 @@ def phase3_install_zowe(tools, workspace, auto_continue=False):
     print("安裝 Zowe-Cli 完成。\n")
 
 @confirm_step("【步驟 4】安裝 python 套件包")
-def phase4_install_python_modules(tools, workspace, auto_continue=False):
+def phase4_install_python_modules(tools, resolved_dirs, workspace, auto_continue=False):
     # 載入 pip.yml 設定檔
     pip = load_pip_config()
     # 建立 python venv 虛擬環境
     print("建立 python venv 虛擬環境...")
-    python_home_path = find_home_path(compose_folder_path(workspace, tools["python"]["dir"]), "python.exe")
-    python_venv_path = os.path.join(compose_folder_path(workspace, tools["python"]["dir"]), "venv")
+    python_home_path = find_home_path(resolved_dirs["python"], "python.exe")
+    python_venv_path = os.path.join(resolved_dirs["python"], "venv")
     if python_home_path:
         try:
             run_with_spinner(
@@ -222,13 +336,28 @@ def phase4_install_python_modules(tools, workspace, auto_continue=False):
     print("安裝 python 套件包...")
     venv_python_home_path = find_home_path(python_venv_path, "python.exe")
     if venv_python_home_path:
+        venv_python = os.path.join(venv_python_home_path, "python.exe")
+        pip_install = [venv_python, "-m", "pip", "install",
+            "--no-input", "--disable-pip-version-check", "--no-cache-dir",
+            "--no-index", f"--find-links={os.path.join(workspace, 'pywhls')}"]
+        # 以單一 pip 指令一次安裝所有套件，只需啟動一次 pip 並解析一次相依關係
+        print(f"準備安裝 {', '.join(pip['whls'])}...")
+        try:
+            run_with_spinner(
+                pip_install + pip["whls"],
+                "安裝 python 套件包",
+                timeout=300 * len(pip["whls"])  # 每個套件 5分鐘超時
+            )
+            print("安裝 python 套件包完成。\n")
+            return
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            print("整批安裝失敗，改為逐一安裝各套件。")
+        # 整批安裝失敗時逐一安裝，讓個別套件的失敗不影響其他套件（已安裝的套件 pip 會直接略過）
         for whl in pip["whls"]:
             print(f"準備安裝 {whl}...")
             try:
                 run_with_spinner(
-                    [os.path.join(venv_python_home_path, "python.exe"), "-m", "pip", "install",
-                        "--no-input", "--disable-pip-version-check", "--no-cache-dir",
-                        "--no-index", f"--find-links={os.path.join(workspace, 'pywhls')}", whl],
+                    pip_install + [whl],
                     f"安裝 {whl}",
                     timeout=300  # 5分鐘超時
                 )
@@ -246,101 +375,160 @@ def phase4_install_python_modules(tools, workspace, auto_continue=False):
     print("安裝 python 套件包完成。\n")
 
 @confirm_step("【步驟 5】路徑設定遷移：請確認設定檔修改")
-def phase5_path_migration(tools, java_home_path, workspace, auto_continue=False):
-    # 產生轉義字串與 URI
-    qbsworkspace = escape_backslashes(f"{workspace}", for_regex=True)
+def phase5_path_migration(tools, resolved_dirs, java_home_path, java_versions, workspace, auto_continue=False):
+    # 設定檔為 JSON，路徑中的反斜線需轉義；URI 則不需轉義
     workspaceuri = quote(Path(workspace).as_uri())
     
     # 複製 VSCode 設定結構
     source_from = os.path.join(workspace, "data")
-    copy_to = os.path.join(compose_folder_path(workspace, tools["vscode"]["dir"]), "data")
+    copy_to = os.path.join(resolved_dirs["vscode"], "data")
     copy_contents_to_with_spinner(source_from, copy_to)
     
-    # 修改 VSCode 設定檔內容
-    vscode_settings_path = os.path.join(compose_folder_path(workspace, tools["vscode"]["dir"]), "data", "user-data", "User", "settings.json")
-    replace_in_file(vscode_settings_path, r"_WORKSPACE_", qbsworkspace)
-    replace_in_file(vscode_settings_path, r"_WORKSPACEURI_", workspaceuri)
-    replace_in_file(vscode_settings_path, r"_JAVAHOME_", escape_backslashes(java_home_path, for_regex=True))
+    # 修改 VSCode 設定檔內容：先收集所有要取代的字串，最後一次寫回設定檔
+    vscode_settings_path = os.path.join(copy_to, "user-data", "User", "settings.json")
+    substitutions = {
+        "_WORKSPACE_": escape_backslashes(f"{workspace}"),
+        "_WORKSPACEURI_": workspaceuri,
+        "_JAVAHOME_": escape_backslashes(java_home_path),
+    }
     
     # 修改 Python 虛擬環境路徑
-    python_venv_path = os.path.join(compose_folder_path(workspace, tools["python"]["dir"]), "venv")
-    python_venv_exec_path = os.path.join(compose_folder_path(workspace, tools["python"]["dir"]), "venv", "Scripts", "python.exe")
-    replace_in_file(vscode_settings_path, r"_PYTHON_VENV_HOME_", escape_backslashes(python_venv_path, for_regex=True))
-    replace_in_file(vscode_settings_path, r"_PYTHON_VENV_EXEC_", escape_backslashes(python_venv_exec_path, for_regex=True))
+    python_venv_path = os.path.join(resolved_dirs["python"], "venv")
+    python_venv_exec_path = os.path.join(python_venv_path, "Scripts", "python.exe")
+    substitutions["_PYTHON_VENV_HOME_"] = escape_backslashes(python_venv_path)
+    substitutions["_PYTHON_VENV_EXEC_"] = escape_backslashes(python_venv_exec_path)
     
     # 修改 Zapp 設定檔路徑
-    zapp_schema_path = find_target_file_path_by_pattern(
-        compose_folder_path(workspace, "workspace"), "zapp-schema*.json")
+    workspace_dir = compose_folder_path(workspace, "workspace")
+    zapp_schema_path = find_target_file_path_by_pattern(workspace_dir, "zapp-schema*.json")
     if zapp_schema_path:
-        zapp_schema_uri = quote(Path(zapp_schema_path).resolve().as_uri())
-        replace_in_file(vscode_settings_path, r"_ZAPP_SCHEMA_URI_", zapp_schema_uri)
+        substitutions["_ZAPP_SCHEMA_URI_"] = quote(Path(zapp_schema_path).resolve().as_uri())
     else:
         print("找不到 zapp-schema-*.json，請確認後再執行。")
         sys.exit(1)
     
     # 修改 Zcodeformat 設定檔路徑
-    zcodeformat_schema_path = find_target_file_path_by_pattern(
-        compose_folder_path(workspace, "workspace"), "zcodeformat-schema*.json")
+    zcodeformat_schema_path = find_target_file_path_by_pattern(workspace_dir, "zcodeformat-schema*.json")
     if zcodeformat_schema_path:
-        zcodeformat_schema_uri = quote(Path(zcodeformat_schema_path).resolve().as_uri())
-        replace_in_file(vscode_settings_path, r"_ZCODE_FORMAT_SCHEMA_URI_", zcodeformat_schema_uri)
+        substitutions["_ZCODE_FORMAT_SCHEMA_URI_"] = quote(Path(zcodeformat_schema_path).resolve().as_uri())
     else:
         print("找不到 zcodeformat-schema-*.json，請確認後再執行。")
         sys.exit(1)
     
-    # 組成 java runtime 清單（僅取 major 版本）
-    java_versions = sorted([key for key in tools if key.startswith("java")], reverse=True)
+    # 組成 java runtime 清單（僅取 major 版本；java_versions 為步驟 2 已排序好的 java 工具清單），json.dumps 會自行轉義路徑中的反斜線
     java_runtimes = []
     for key in java_versions:
         major_version = extract_major_version(key)
         java_runtimes.append({
             "name": f"JavaSE-{major_version}",
-            "path": escape_backslashes(compose_folder_path(workspace, tools[key]["dir"]))
+            "path": resolved_dirs[key]
         })
-    runtime_json = ",\n".join(json.dumps(entry) for entry in java_runtimes)
-    replace_in_file(vscode_settings_path, r"\"_JAVA_RUNTIMES_\"", runtime_json)
+    substitutions['"_JAVA_RUNTIMES_"'] = ",\n".join(json.dumps(entry, separators=(",", ":")) for entry in java_runtimes)
+    replace_many_in_file(vscode_settings_path, substitutions)
     
     print("路徑設定遷移完成。\n")
     return
 
 @confirm_step("【步驟 6】安裝 VSCode 擴充功能包：請確認安裝擴充功能包")
-def phase6_install_extensions(tools, workspace, auto_continue=False):
+def phase6_install_extensions(tools, resolved_dirs, workspace, install_concurrency=None, auto_continue=False):
     # 載入 extensions.yml 設定檔
     extensions = load_extensions_config()
+    code_home = os.path.join(resolved_dirs["vscode"], "bin")
+    code_cmd = os.path.join(code_home, "code.cmd")
+    group_folder = os.path.join(workspace, "extensions")
+    # 擴充功能包資料夾只列出一次，再依 publisher 順序以檔名前綴「<publisher>.」分組整理成單一清單
+    # （以完整前綴比對，ms-vscode 不會誤含 ms-vscode-remote 的檔案）
+    vsix_files = get_all_files_reversed_sorted(group_folder, "*.vsix")
+    vsix_names = [os.path.basename(vsix).lower() for vsix in vsix_files]
+    all_extensions = []
     for publisher, _ in extensions.items():
-        group_folder = os.path.join(workspace, "extensions")
-        all_group_extensions = get_all_files_reversed_sorted(group_folder, f"{publisher}*.vsix")
-        for extension in all_group_extensions:
-            print(f"準備安裝 {os.path.basename(extension)}...")
-            try:
-                run_with_spinner(
-                    [os.path.join(compose_folder_path(workspace, tools["vscode"]["dir"]), "bin", "code.cmd"),
-                        "--install-extension", extension],
-                    f"安裝 {os.path.basename(extension)}",
-                    cwd=os.path.join(compose_folder_path(workspace, tools["vscode"]["dir"]), "bin"),
-                    timeout=300  # 5分鐘超時
-                )
-                print(f"安裝 {os.path.basename(extension)} 完成。")
-                # 安裝完畢後強制結束 VSCode 相關進程
-                for proc in ["Code.exe", "code.exe", "code.cmd"]:
-                    subprocess.run(["taskkill", "/IM", proc, "/F"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            except subprocess.CalledProcessError as e:
-                print(f"安裝 {os.path.basename(extension)} 失敗，錯誤代碼：{e.returncode}")
-                if e.stderr:
-                    print(f"錯誤訊息：{e.stderr}")
+        prefix = f"{publisher.lower()}."
+        all_extensions.extend(vsix for vsix, name in zip(vsix_files, vsix_names) if name.startswith(prefix))
+
+    # 每次呼叫 VSCode CLI 的時間多半花在啟動上：同一批次的擴充功能包以重複的 --install-extension 參數一次安裝，
+    # 依序切成與行程數相同的批次（命令列過長時再切分），每批次的命令列長度不超過 CODE_CMD_MAX_LENGTH；
+    # 預設只有一個行程，各批次依序執行，install_concurrency 大於 1 時才交由執行緒池同時進行
+    def run_install(batch):
+        args = [code_cmd]
+        for extension in batch:
+            args += ["--install-extension", extension]
+        try:
+            # 關閉子行程的標準輸入，VSCode CLI 不會等待輸入，也不必繼承主控台的輸入控制代碼
+            result = subprocess.run(
+                args,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=code_home,
+                timeout=300 * len(batch)  # 每個擴充功能包5分鐘超時
+            )
+            return result.returncode, result.stderr
+        except subprocess.TimeoutExpired:
+            return None, ""
+
+    def install_batch(batch):
+        returncode, stderr = run_install(batch)
+        if returncode == 0 or returncode is None or len(batch) == 1:
+            return [(returncode, stderr)] * len(batch)
+        # 批次安裝失敗時改為逐一安裝，以取得各擴充功能包各自的結果
+        return [run_install([extension]) for extension in batch]
+
+    workers = max(1, min(install_concurrency or DEFAULT_INSTALL_CONCURRENCY, len(all_extensions)))
+    batch_size = -(-len(all_extensions) // workers)
+    batches = []
+    command_length = 0
+    for extension in all_extensions:
+        # 每個參數另計前後引號與空白
+        length = len(" --install-extension ") + len(extension) + 2
+        if not batches or len(batches[-1]) >= batch_size or command_length + length > CODE_CMD_MAX_LENGTH:
+            batches.append([])
+            command_length = len(code_cmd) + 2
+        batches[-1].append(extension)
+        command_length += length
+
+    stop_event = threading.Event()
+    spinner_thread = threading.Thread(
+        target=spinner,
+        args=(
+            stop_event,
+            f"準備安裝 {len(all_extensions)} 個擴充功能包...",
+            "安裝中",
+            "安裝完成"
+        )
+    )
+    spinner_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = [result for batch_results in executor.map(install_batch, batches) for result in batch_results]
+    finally:
+        stop_event.set()
+        spinner_thread.join()
+        # 全部安裝完畢後以單一 taskkill 強制結束 VSCode 相關進程（映像名稱不分大小寫，Code.exe 已涵蓋 code.exe）
+        subprocess.run(["taskkill", "/F", "/IM", "Code.exe", "/IM", "code.cmd"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for extension, (returncode, stderr) in zip(all_extensions, results):
+        if returncode == 0:
+            print(f"安裝 {os.path.basename(extension)} 完成。")
+        elif returncode is None:
+            print(f"安裝 {os.path.basename(extension)} 超時，但可能已成功安裝。")
+        else:
+            print(f"安裝 {os.path.basename(extension)} 失敗，錯誤代碼：{returncode}")
+            if stderr:
+                print(f"錯誤訊息：{stderr}")
     print("擴充功能包安裝完成。\n")
     return
 
 @confirm_step("【步驟 7】建立 VSCode 快捷方式：請確認建立捷徑")
-def phase7_create_shortcut(tools, java_home_path, workspace, auto_continue=False):
+def phase7_create_shortcut(tools, resolved_dirs, java_home_path, workspace, auto_continue=False):
     shortcut_path = os.path.join(workspace, "VSCode.lnk")
     if os.path.exists(shortcut_path):
         os.remove(shortcut_path)
         print("已刪除既有的 VSCode.lnk 快捷方式。")
         
-    vscmd = os.path.join(compose_folder_path(workspace, tools["vscode"]["dir"]), "bin", "code.cmd")
-    vscmd_home = os.path.join(compose_folder_path(workspace, tools["vscode"]["dir"]), "bin")
-    vsc_home = compose_folder_path(workspace, tools["vscode"]["dir"])
+    vsc_home = resolved_dirs["vscode"]
+    vscmd_home = os.path.join(vsc_home, "bin")
+    vscmd = os.path.join(vscmd_home, "code.cmd")
     
     # 拼湊要插入於批次檔中的環境設定語法
     tool_home_paths = []
@@ -348,9 +536,9 @@ def phase7_create_shortcut(tools, java_home_path, workspace, auto_continue=False
         if info["add_home_path_to_env"]:
             for executable in info["home_path_of"]:
                 if tool == "python":
-                    home_path = find_home_path(os.path.join(compose_folder_path(workspace, info["dir"]), "venv", "Scripts"), executable)
+                    home_path = find_home_path(os.path.join(resolved_dirs[tool], "venv", "Scripts"), executable)
                 else:
-                    home_path = find_home_path(compose_folder_path(workspace, info["dir"]), executable)
+                    home_path = find_home_path(resolved_dirs[tool], executable)
                 if home_path:
                     tool_home_paths.append(home_path)
     insertions = [
@@ -360,22 +548,39 @@ def phase7_create_shortcut(tools, java_home_path, workspace, auto_continue=False
         ),
         'set "JAVA_HOME={}"\n'.format(java_home_path)
     ]
-    vscode_cmd_insertion(vscmd, insertions)
-    print("已插入臨時 PATH 與 JAVA_HOME 設定於 VSCode 啟動檔中。")
+    inserted = vscode_cmd_insertion(vscmd, insertions)
+    if inserted is None:
+        print(f"警告：VSCode 啟動檔 {vscmd} 中找不到 setlocal 行，未插入 PATH 與 JAVA_HOME 設定，請確認啟動檔是否正確。")
+    elif inserted:
+        print("已插入臨時 PATH 與 JAVA_HOME 設定於 VSCode 啟動檔中。")
+    else:
+        print("VSCode 啟動檔中已有相同的 PATH 與 JAVA_HOME 設定，略過插入。")
     
     # 載入 init.yml 設定檔
     init_config = load_init_config()
-    if win32com is not None:
-        shell = win32com.client.Dispatch("WScript.Shell")
-        shortcut = shell.CreateShortcut(shortcut_path)
-        shortcut.TargetPath = vscmd
-        shortcut.Arguments = " ".join([os.path.join(workspace, "workspace", init_config["default"]["workspace"]), f"--locale={init_config['default']['locale']}"])
-        shortcut.WorkingDirectory = vscmd_home
-        shortcut.IconLocation = os.path.join(vsc_home, "Code.exe") + ",0"
-        shortcut.Save()
+    arguments = " ".join([os.path.join(workspace, "workspace", init_config["default"]["workspace"]), f"--locale={init_config['default']['locale']}"])
+    code_exe = os.path.join(vsc_home, "Code.exe")
+    try:
+        # 直接寫出 .lnk 檔，不必啟動 WScript.Shell COM 服務；寫入失敗時才改用 pywin32
+        write_shortcut(shortcut_path, vscmd, arguments=arguments, working_directory=vscmd_home, icon_location=code_exe, icon_index=0)
         print("VSCode 快捷方式建立成功。")
-    else:
-        print("無 win32com 模組，無法建立 Windows 快捷方式。")
+    except OSError as e:
+        # pywin32 僅在此備援路徑才需要，到這裡才載入，一般執行不必載入 COM 相關模組
+        try:
+            import win32com.client
+        except ImportError:
+            win32com = None
+        if win32com is not None:
+            shell = win32com.client.Dispatch("WScript.Shell")
+            shortcut = shell.CreateShortcut(shortcut_path)
+            shortcut.TargetPath = vscmd
+            shortcut.Arguments = arguments
+            shortcut.WorkingDirectory = vscmd_home
+            shortcut.IconLocation = code_exe + ",0"
+            shortcut.Save()
+            print("VSCode 快捷方式建立成功。")
+        else:
+            print(f"無法建立 Windows 快捷方式：{e}")
     print("快捷方式建立完成。\n")
     return
 
@@ -386,7 +591,18 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Install script with optional auto-confirmation.")
     parser.add_argument("-y", "--yes", action="store_true", help="自動執行所有步驟，不須等待使用者確認。")
     parser.add_argument("--workspace", type=str, help="指定工作區目錄，預設為腳本檔所在路徑。")
-    return parser.parse_args()
+    parser.add_argument(
+        "--install-concurrency", type=int,
+        help=(
+            "同時執行的 VSCode CLI 安裝行程數，預設為 1（依序安裝）。"
+            "大於 1 時各行程會同時寫入同一個 data/extensions 目錄與 extensions.json，VSCode 不保證此情況安全，"
+            "只有在安裝後會自行以 code --list-extensions 確認擴充功能都已安裝時才建議調高。"
+        )
+    )
+    args = parser.parse_args()
+    if args.install_concurrency is not None and args.install_concurrency < 1:
+        parser.error("--install-concurrency 必須為正整數。")
+    return args
 
 def main():
     args = parse_arguments()
@@ -396,16 +612,32 @@ def main():
     print("目前工作目錄設定為：", workspace)
     
     # 執行各階段流程
-    tools, tool_files = phase1_check_tools(workspace, auto_continue=args.yes)
-    java_home_path, _ = phase2_extract_packages(tools, tool_files, workspace, auto_continue=args.yes)
-    phase3_install_zowe(tools, workspace, auto_continue=args.yes)
-    phase4_install_python_modules(tools, workspace, auto_continue=args.yes)
-    phase5_path_migration(tools, java_home_path, workspace, auto_continue=args.yes)
-    phase6_install_extensions(tools, workspace, auto_continue=args.yes)
-    phase7_create_shortcut(tools, java_home_path, workspace, auto_continue=args.yes)
+    tools, tool_files, resolved_dirs = phase1_check_tools(workspace, auto_continue=args.yes)
+    java_home_path, java_versions = phase2_extract_packages(tools, resolved_dirs, tool_files, workspace, auto_continue=args.yes)
+    if args.yes:
+        # 自動執行時不需等待使用者確認，Zowe-Cli（npm）與 python 套件（pip）彼此獨立，
+        # python 套件於背景子行程安裝，與前景的 Zowe-Cli 安裝同時進行，完成後再印出其輸出
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            phase4_future = executor.submit(
+                run_phase_captured, phase4_install_python_modules,
+                tools, resolved_dirs, workspace, auto_continue=args.yes
+            )
+            phase3_install_zowe(tools, resolved_dirs, workspace, auto_continue=args.yes)
+            phase4_output, phase4_error = phase4_future.result()
+        print(phase4_output, end="")
+        if phase4_error is not None:
+            raise phase4_error
+    else:
+        phase3_install_zowe(tools, resolved_dirs, workspace, auto_continue=args.yes)
+        phase4_install_python_modules(tools, resolved_dirs, workspace, auto_continue=args.yes)
+    phase5_path_migration(tools, resolved_dirs, java_home_path, java_versions, workspace, auto_continue=args.yes)
+    phase6_install_extensions(tools, resolved_dirs, workspace, install_concurrency=args.install_concurrency, auto_continue=args.yes)
+    phase7_create_shortcut(tools, resolved_dirs, java_home_path, workspace, auto_continue=args.yes)
     
     print("腳本執行結束。")
     pause_if_needed("按下 Enter 鍵後關閉程式", auto_continue=args.yes)
 
 if __name__ == "__main__":
+    # 打包為 install.exe 後，行程池的子行程需由此進入
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -9,6 +9,7 @@ IBM VSCode for Z Development Environment Setup Script
 根據先前工具對應的資料夾路徑，
 將這些目錄中除了 .zip 檔案以外的所有檔案與子目錄全部刪除，
 達到清除（uninstall）已展開區域的目的。
+各工具的資料夾彼此獨立，交由執行緒池同時清理，清理訊息以 safe_print 逐行輸出，不會交錯。
 
 工具對應的資料夾路徑如下：
     - vscode: <腳本所在目錄>/vscode
@@ -30,13 +31,13 @@ IBM VSCode for Z Development Environment Setup Script
 
 import os
 import argparse
-import glob
-import shutil
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from utils.file_utils import cleanup_directory_except
-from utils.path_utils import compose_folder_path, get_script_dir
+from utils.message_utils import safe_print
+from utils.path_utils import compile_patterns, compose_folder_path, get_script_dir
 
 # 導入我們的設定檔工具模組
 from configs import (
@@ -46,30 +47,44 @@ from configs import (
 # -------------------------------
 #  功能函式
 # -------------------------------
+def cleanup_tool(tool_name, config, workspace, verbose=False):
+    """
+    於執行緒池中清理單一工具的資料夾（見 cleanup_directory_except），只保留 .<type> 檔。
+    """
+    safe_print(f"清理 [{tool_name}] 目錄：{config['dir']}")
+    cleanup_directory_except(compose_folder_path(workspace, config["dir"]), f".{config['type']}", verbose=verbose)
+
 def restore_backup(workspace_dir):
     """
     檢查 workspace 目錄內是否有 zowe.config.backup_*.json 備份檔，
     若有，則將最新的備份檔還原為 zowe.config.json，並刪除該備份檔。
     """
-    backup_files = glob.glob(os.path.join(workspace_dir, "zowe.config.backup_*.json"))
+    # 備份檔名含時間戳記，名稱最大者即為最新的備份檔；以 os.scandir 掃描一次並隨時記錄目前最大的名稱，不必排序整份清單
+    match_backup = compile_patterns(("zowe.config.backup_*.json",))
+    latest_name = None
+    if os.path.isdir(workspace_dir):
+        with os.scandir(workspace_dir) as it:
+            for entry in it:
+                if match_backup(entry.name) and (latest_name is None or entry.name > latest_name):
+                    latest_name = entry.name
     
-    if not backup_files:
+    if latest_name is None:
         print("未找到 zowe.config.json 的備份檔，跳過還原動作。")
         return
     
-    # 依照檔案名稱排序，確保取最新的備份檔
-    backup_files.sort(reverse=True)
-    latest_backup = backup_files[0]
+    latest_backup = os.path.join(workspace_dir, latest_name)
     
     config_path = os.path.join(workspace_dir, "zowe.config.json")
     
     try:
-        # 還原備份檔
-        shutil.copy(latest_backup, config_path)
+        # 還原備份檔：備份檔與設定檔位於同一目錄，以 os.replace 直接改名取代，不必複製內容後再刪除備份檔，
+        # 也不會有設定檔只寫入一半的情況
+        if os.path.exists(config_path) and os.path.samefile(latest_backup, config_path):
+            # 設定檔未曾被取代時，硬連結備份與設定檔是同一個檔案（改名不會有任何動作），直接刪除備份檔即可
+            os.remove(latest_backup)
+        else:
+            os.replace(latest_backup, config_path)
         print(f"已還原 {latest_backup} 為 {config_path}")
-        
-        # 刪除備份檔
-        os.remove(latest_backup)
         print(f"已刪除備份檔：{latest_backup}")
     except Exception as e:
         print(f"還原過程發生錯誤：{e}")
@@ -81,6 +96,7 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Install script with optional auto-confirmation.")
     parser.add_argument("-y", "--yes", action="store_true", help="自動執行所有步驟，不須等待使用者確認。")
     parser.add_argument("--workspace", type=str, help="指定工作區目錄，預設為腳本檔所在路徑。")
+    parser.add_argument("-v", "--verbose", action="store_true", help="逐一列出每個已刪除的檔案與目錄（預設只顯示摘要）。")
     return parser.parse_args()
 
 def main():
@@ -95,10 +111,16 @@ def main():
     
     print("=== Uninstall 開始 ===\n")
     
-    # 逐一清理每個工具所在的資料夾，本動作將保留資料夾中所有 .zip 檔，其它內容皆清除
-    for tool_name, config in tools.items():
-        print(f"清理 [{tool_name}] 目錄：{config['dir']}")
-        cleanup_directory_except(compose_folder_path(workspace, config["dir"]), f".{config['type']}")
+    # 清理每個工具所在的資料夾，本動作將保留資料夾中所有 .zip 檔，其它內容皆清除；
+    # 刪除檔案多半在等待磁碟（及防毒掃描），各資料夾交由執行緒池同時清理
+    print(f"開始清理 {len(tools)} 個工具目錄...")
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(tools)))) as executor:
+        futures = [
+            executor.submit(cleanup_tool, tool_name, config, workspace, args.verbose)
+            for tool_name, config in tools.items()
+        ]
+        for future in futures:
+            future.result()
     
     # 執行備份檔還原
     workspace_dir = os.path.join(workspace, "workspace")
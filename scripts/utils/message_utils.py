@@ -8,8 +8,9 @@ IBM VSCode for Z Development Environment Setup Script
 說明:
 1. 顯示訊息等待使用者按下 Enter，若 auto_continue 為 True，則僅印出訊息後自動繼續。
 2. 提供 decorator：在執行被裝飾的函式前顯示待確認訊息，並依 auto_continue 參數決定是否需要等待使用者確認。
-3. 提供 spinner 執行 subprocess.run，在執行期間顯示等待訊息。
+3. 提供 spinner 執行 subprocess.run，在執行期間顯示等待訊息（子行程輸出寫入暫存檔，僅於失敗時讀回；短於 SPINNER_GRACE_PERIOD 的命令不顯示動畫）。
 4. 提供使用者互動和進度顯示功能。
+5. 提供多執行緒共用的 safe_print，避免同時輸出的訊息交錯。
 
 更新記錄:
 - v2.6.0: 優化使用者介面，改善進度顯示和錯誤處理
@@ -20,14 +21,37 @@ IBM VSCode for Z Development Environment Setup Script
 """
 
 import functools
+import itertools
+import locale
 import subprocess
 import sys
+import tempfile
 import threading
-import time
+
+# 多個執行緒同時輸出訊息時共用的鎖
+PRINT_LOCK = threading.Lock()
+
+# spinner 開始顯示動畫前的等待秒數；在此之前就完成的動作只印出開始與完成訊息，不會輸出任何動畫字元
+SPINNER_GRACE_PERIOD = 0.5
+
+def safe_print(*args, **kwargs):
+    """與 print 相同，但同一時間只允許一個執行緒輸出，避免多執行緒的訊息交錯。"""
+    with PRINT_LOCK:
+        print(*args, **kwargs)
+
+def read_process_output(output_file):
+    """讀取暫存檔中的子行程輸出，比照 subprocess 的 text=True 以系統預設編碼解碼並統一換行字元。"""
+    output_file.seek(0)
+    data = output_file.read()
+    if not data:
+        return ""
+    return data.decode(locale.getpreferredencoding(False), errors="replace").replace("\r\n", "\n")
 
 def run_with_spinner(cmd, description, env=None, cwd=None, timeout=None):
     """
     使用 spinner 執行 subprocess.run，在執行期間顯示等待訊息。
+    子行程的標準輸出與錯誤輸出直接寫入暫存檔，不經過管線由 Python 逐段讀取；
+    只有在執行失敗時才讀回暫存檔內容，附於 CalledProcessError 的 stdout / stderr 供呼叫端顯示。
     
     Args:
         cmd: 要執行的命令列表
@@ -37,18 +61,22 @@ def run_with_spinner(cmd, description, env=None, cwd=None, timeout=None):
         timeout: 超時時間
     
     Returns:
-        subprocess.CompletedProcess 物件
+        subprocess.CompletedProcess 物件（成功時不讀取輸出，stdout 與 stderr 為 None）
     """
     stop_event = threading.Event()
     
     def spinner_thread():
-        spinner_chars = "|/-\\"
-        idx = 0
         print(f"開始執行：{description}")
-        while not stop_event.is_set():
-            print(f"執行中... {spinner_chars[idx % len(spinner_chars)]}", end='\r', flush=True)
-            idx += 1
-            time.sleep(0.2)
+        # 輸出導向檔案或管線時不需要動畫，只印出開始與完成訊息，不必每 0.2 秒喚醒一次；
+        # 在 SPINNER_GRACE_PERIOD 內完成的命令也同樣不顯示動畫
+        if not sys.stdout.isatty() or stop_event.wait(SPINNER_GRACE_PERIOD):
+            stop_event.wait()
+            print("執行完成！", flush=True)
+            return
+        # stop_event.wait 同時負責等待與檢查停止旗標，停止時立即返回，不必等到下一次喚醒
+        spinner_chars = itertools.cycle("|/-\\")
+        while not stop_event.wait(0.2):
+            print(f"執行中... {next(spinner_chars)}", end='\r', flush=True)
         sys.stdout.write("\r" + f"執行完成！{' ' * 20}\n")
         sys.stdout.flush()
     
@@ -57,17 +85,23 @@ def run_with_spinner(cmd, description, env=None, cwd=None, timeout=None):
     spinner_thread_obj.start()
     
     try:
-        # 執行命令
-        result = subprocess.run(
-            cmd,
-            text=True,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=env,
-            cwd=cwd,
-            timeout=timeout
-        )
+        with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+            # 執行命令
+            result = subprocess.run(
+                cmd,
+                stdout=stdout_file,
+                stderr=stderr_file,
+                env=env,
+                cwd=cwd,
+                timeout=timeout
+            )
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    result.returncode,
+                    cmd,
+                    output=read_process_output(stdout_file),
+                    stderr=read_process_output(stderr_file)
+                )
         return result
     except subprocess.CalledProcessError as e:
         # 停止 spinner 並顯示錯誤
@@ -7,14 +7,18 @@ IBM VSCode for Z Development Environment Setup Script
 
 說明:
 1. 提供 escape_backslashes 函式，將 Windows 路徑中的反斜線轉為程式碼中需要的跳脫字元格式。
-2. 提供 get_script_dir 函式，取得腳本所在目錄。
+2. 提供 get_script_dir 函式，取得腳本所在目錄（結果會被記錄，重複呼叫不再解析路徑）。
 3. 提供 compose_folder_path 函式，組合 workspace 與 path_parts 成為完整路徑。
 4. 提供 get_latest_file 函式，在指定目錄中尋找與 pattern 相符的檔案，並根據修改時間由新至舊排序，回傳最新檔案名稱。
 5. 提供 get_all_files_reversed_sorted 函式，回傳指定目錄中所有符合 pattern 的檔案清單，依名稱字典序倒序排列。
-6. 提供 find_real_directory 函式，從起始資料夾向下遞迴搜尋，直到某資料夾中包含非 target_pattern 檔案，則視為「實體目錄」並回傳該路徑。
+6. 提供 find_real_directory 函式，從起始資料夾向下遞迴搜尋，直到某資料夾中包含非 target_pattern 檔案，則視為「實體目錄」並回傳該路徑（可限制搜尋層數，多個子資料夾時同時搜尋）。
 7. 提供 find_target_file_path_by_pattern 函式，從起始資料夾向下遞迴搜尋，找到某一個包含 target_pattern 的資料夾則回傳其路徑。
-8. 提供 find_home_path 函式，從起始資料夾向下遞迴搜尋，找到某一個包含 target_file 的資料夾則回傳其路徑。
+8. 提供 find_home_path 函式，從起始資料夾向下遞迴搜尋，找到某一個包含 target_file 的資料夾則回傳其路徑（找到的結果會被記錄，重複搜尋不再走訪目錄；可限制搜尋層數）。
 9. 提供 find_target_file_path 函式，從起始資料夾向下遞迴搜尋，找到某一個包含 target_file 的資料夾則回傳其路徑。
+10. 提供 compile_patterns 函式，將多個 fnmatch 樣式編譯為單一比對函式（固定名稱以集合查表、萬用字元樣式合併為單一正規表達式），供迴圈中重複比對使用。
+11. 提供 find_home_paths 函式，走訪一次目錄同時尋找多個檔案所在的資料夾，並可將結果記錄供 find_home_path 直接取用。
+12. 提供 walk_files 函式，以 os.scandir 與明確的堆疊依 os.walk 的順序走訪目錄，供各個向下搜尋的函式使用（找到結果即停止）。
+13. 提供 search_real_directory 函式，循序搜尋單一資料夾下的實體目錄，供 find_real_directory 分派至各執行緒。
 
 更新記錄:
 - v2.6.0: 優化路徑處理邏輯，改善目錄結構處理
@@ -26,24 +30,39 @@ IBM VSCode for Z Development Environment Setup Script
 
 import fnmatch
 import os
-import glob
+import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+# find_home_path 找到的結果：{(起始資料夾, 小寫檔名): 所在資料夾}
+HOME_PATH_CACHE = {}
+
+# find_real_directory 不往下走訪的資料夾：版本控制、套件與快取資料夾不會是工具包解壓後的實體目錄，且通常含有大量檔案
+REAL_DIRECTORY_SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv"})
+
+# find_real_directory 同時搜尋各子資料夾的執行緒數上限
+REAL_DIRECTORY_MAX_WORKERS = 8
+
+# escape_backslashes 使用的字元轉換表：一般情況將反斜線轉為雙反斜線，for_regex 時轉為四個反斜線
+BACKSLASH_TABLE = str.maketrans({"\\": "\\\\"})
+REGEX_BACKSLASH_TABLE = str.maketrans({"\\": "\\\\\\\\"})
+
 def escape_backslashes(path: str, for_regex: bool = False) -> str:
     """
     將 Windows 路徑中的反斜線轉為程式碼中需要的跳脫字元格式。
     """
-    if for_regex:
-        # 若 for_regex 為 True，則將路徑中的反斜線轉為跳脫字元格式，並將單反斜線轉為雙反斜線
-        return escape_backslashes(path.replace("\\", "\\\\"))
-    else:
-        return path.replace("\\", "\\\\")
+    # 若 for_regex 為 True，則每個反斜線轉為四個反斜線，否則轉為兩個；以 str.translate 一次處理完成
+    return path.translate(REGEX_BACKSLASH_TABLE if for_regex else BACKSLASH_TABLE)
 
+@lru_cache(maxsize=1)
 def get_script_dir():
     """
     若被 PyInstaller 打包，則使用 sys.executable 的目錄的上層作為腳本所在目錄；
     否則使用 __file__ 的目錄的上層。
+    結果於第一次呼叫後記錄，之後不再重新解析路徑（Path 為不可變物件，可安全共用）。
     """
     # 取得腳本所在目錄（考慮是否為 PyInstaller 打包）
     if getattr(sys, 'frozen', False):
@@ -56,71 +75,258 @@ def get_script_dir():
 def compose_folder_path(workspace, sub_folder_path):
     """
     組合 workspace 與 path_parts 成為完整路徑。
+    sub_folder_path 可使用「/」或「\\」分隔，一律視為 workspace 下的相對路徑；
+    以 os.path.normpath 統一為作業系統的分隔字元，不需先拆成清單再逐段組合。
     """
-    return os.path.join(workspace, *(sub_folder_path.replace("\\", "/").split("/")))
+    return os.path.normpath(os.path.join(workspace, sub_folder_path.replace("\\", "/").lstrip("/")))
 
 def get_latest_file(directory, pattern):
     """
     在指定目錄中尋找與 pattern 相符的檔案，並根據修改時間由新至舊排序，回傳最新檔案名稱。
     找不到則回傳空字串。
+    以 os.scandir 單次走訪目錄並隨時記錄目前最新的項目，修改時間取自 DirEntry（Windows 上直接來自目錄清單），
+    不需先建立完整清單再逐一 stat 後排序；與 glob 相同，pattern 不以「.」開頭時略過隱藏檔。
     """
-    search_path = os.path.join(directory, pattern)
-    matched_files = glob.glob(search_path)
-    if not matched_files:
+    if not os.path.isdir(directory):
         return ""
-    matched_files.sort(key=lambda f: os.path.getmtime(f), reverse=True)
-    return os.path.basename(matched_files[0])
+    match = compile_patterns((pattern,))
+    include_hidden = pattern.startswith(".")
+    latest_name = ""
+    latest_mtime = None
+    with os.scandir(directory) as it:
+        for entry in it:
+            if (entry.name.startswith(".") and not include_hidden) or not match(entry.name):
+                continue
+            mtime = entry.stat().st_mtime_ns
+            if latest_mtime is None or mtime > latest_mtime:
+                latest_name, latest_mtime = entry.name, mtime
+    return latest_name
 
 def get_all_files_reversed_sorted(directory, pattern):
     """
     回傳指定目錄中所有符合 pattern 的檔案清單，依名稱字典序倒序排列。
     找不到則回傳空 list。
+    以 os.scandir 走訪目錄，檔案類型直接取自目錄清單，不需對每個項目另外 stat；
+    與 glob 相同，pattern 不以「.」開頭時略過隱藏檔。
     """
-    search_path = os.path.join(directory, pattern)
-    matched_files = glob.glob(search_path)
-    if not matched_files:
+    if not os.path.isdir(directory):
         return []
-    matched_files.sort(key=lambda f: os.path.basename(f), reverse=True)
-    return matched_files
+    match = compile_patterns((pattern,))
+    include_hidden = pattern.startswith(".")
+    with os.scandir(directory) as it:
+        matched_names = [
+            entry.name for entry in it
+            if (include_hidden or not entry.name.startswith("."))
+            and match(entry.name) and entry.is_file()
+        ]
+    matched_names.sort(reverse=True)
+    return [os.path.join(directory, name) for name in matched_names]
 
-def find_real_directory(start_path, target_pattern):
+def walk_files(start_path, skip_dirs=frozenset(), max_depth=None):
     """
-    從起始資料夾向下遞迴搜尋，直到某資料夾中包含非 target_pattern 檔案，則視為「實體目錄」並回傳該路徑。
-    找不到則回傳 None。
+    以 os.scandir 搭配明確的堆疊，依與 os.walk 相同的順序（由上而下、子資料夾依列出順序、不進入符號連結的目錄）
+    走訪 start_path，每個資料夾產生一次 (資料夾路徑, 檔案名稱清單)；無法讀取的資料夾與 os.walk 相同直接略過。
+    子資料夾在呼叫端處理完目前資料夾後才會開啟，找到結果即停止迭代便不再讀取其餘資料夾，也沒有遞迴深度的限制。
+    名稱在 skip_dirs 中的子資料夾整個略過，不往下走訪。
+    max_depth 指定最多往下走訪的層數（0 表示只列出 start_path 本身），None 表示不限制；
+    已達 max_depth 的資料夾不再放入其子資料夾，整個子樹都不會被讀取。
     """
-    for root, _, files in os.walk(os.path.abspath(start_path)):
-        non_target_files = [f for f in files if not f.lower().endswith(target_pattern)]
-        if non_target_files:
+    stack = [(start_path, 0)]
+    while stack:
+        root, depth = stack.pop()
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry.name)
+                    elif not entry.is_symlink() and entry.name not in skip_dirs:
+                        subdirs.append(entry.path)
+        except OSError:
+            continue
+        yield root, files
+        if max_depth is not None and depth >= max_depth:
+            continue
+        # 反向放入堆疊，讓第一個子資料夾最先被取出
+        stack.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+
+def search_real_directory(start_path, suffixes, max_depth=None, stop_event=None):
+    """
+    依 walk_files 的順序循序搜尋 start_path，回傳第一個包含非 suffixes 副檔名檔案的資料夾，找不到則回傳 None。
+    suffixes 須為小寫副檔名的 tuple；stop_event 被設定後不再讀取其餘資料夾並回傳 None，供 find_real_directory 中止平行搜尋。
+    """
+    for root, files in walk_files(start_path, REAL_DIRECTORY_SKIP_DIRS, max_depth):
+        if stop_event is not None and stop_event.is_set():
+            return None
+        if any(not f.lower().endswith(suffixes) for f in files):
             return root
     return None
 
+def find_real_directory(start_path, target_pattern, max_depth=None):
+    """
+    從起始資料夾向下遞迴搜尋，直到某資料夾中包含非 target_pattern 檔案，則視為「實體目錄」並回傳該路徑。
+    找不到則回傳 None。
+    target_pattern 為副檔名（不分大小寫），也可以是多個副檔名的 tuple；不進入符號連結的目錄，
+    也不進入 REAL_DIRECTORY_SKIP_DIRS 中的版本控制、套件與快取資料夾。
+    max_depth 指定最多往下搜尋的層數（0 表示只檢查起始資料夾），None 表示不限制。
+    起始資料夾有多個子資料夾時，各子資料夾以執行緒池同時搜尋（讀取目錄時不佔用 GIL），
+    但仍依子資料夾的順序取結果，回傳值與循序走訪相同；取得結果後即通知其餘的搜尋停止。
+    """
+    suffixes = (target_pattern,) if isinstance(target_pattern, str) else tuple(target_pattern)
+    suffixes = tuple(suffix.lower() for suffix in suffixes)
+    start_path = os.path.abspath(start_path)
+    if max_depth == 0:
+        return search_real_directory(start_path, suffixes, 0)
+
+    # 先讀取起始資料夾一次，檢查其中的檔案並取得要分別搜尋的子資料夾（判斷方式與 walk_files 相同）
+    files = []
+    top_dirs = []
+    try:
+        with os.scandir(start_path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(entry.name)
+                elif not entry.is_symlink() and entry.name not in REAL_DIRECTORY_SKIP_DIRS:
+                    top_dirs.append(entry.path)
+    except OSError:
+        return None
+    if any(not f.lower().endswith(suffixes) for f in files):
+        return start_path
+
+    sub_depth = None if max_depth is None else max_depth - 1
+    if not top_dirs:
+        return None
+    if len(top_dirs) == 1:
+        # 只有一個子資料夾（解壓後常見的結構）時沒有可同時進行的搜尋，直接循序處理
+        return search_real_directory(top_dirs[0], suffixes, sub_depth)
+
+    stop_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=min(REAL_DIRECTORY_MAX_WORKERS, len(top_dirs)))
+    try:
+        futures = [
+            executor.submit(search_real_directory, top_dir, suffixes, sub_depth, stop_event)
+            for top_dir in top_dirs
+        ]
+        for future in futures:
+            result = future.result()
+            if result is not None:
+                return result
+        return None
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def find_target_file_path_by_pattern(start_path, target_pattern):
     """
     從起始資料夾向下遞迴搜尋，找到某一個包含 target_pattern 的資料夾則回傳其路徑。
     找不到則回傳 None。
+    target_pattern 只編譯一次（與 fnmatch.fnmatch 相同，Windows 下不分大小寫），走訪時不再逐檔呼叫 fnmatch。
+    target_pattern 也可以直接傳入 compile_patterns 回傳的比對函式（或任何接受檔名的比對函式），
+    供呼叫端在自己的迴圈外先行編譯。
     """
-    for root, _, files in os.walk(os.path.abspath(start_path)):
+    match = target_pattern if callable(target_pattern) else compile_patterns((target_pattern,))
+    for root, files in walk_files(os.path.abspath(start_path)):
         for file in files:
-            if fnmatch.fnmatch(file, target_pattern):
+            if match(file):
                 return os.path.join(root, file)
     return None
 
-def find_home_path(start_path, target_file):
+def find_home_path(start_path, target_file, max_depth=None):
     """
     從起始資料夾向下遞迴搜尋，找到某一個包含 target_file 的資料夾則回傳其路徑。
     找不到則回傳 None。
+    找到的結果會記錄於 HOME_PATH_CACHE，相同的搜尋不再重新走訪目錄；
+    找不到的結果不記錄，之後建立的檔案（例如稍後才建立的 venv）仍可被找到。
+    max_depth 指定最多往下搜尋的層數（0 表示只檢查起始資料夾），None 表示不限制；
+    限制層數時第一個找到的資料夾可能與不限制時不同，因此以含 max_depth 的鍵另外記錄。
     """
-    for root, _, files in os.walk(os.path.abspath(start_path)):
-        if any(f.lower() == target_file.lower() for f in files):
+    start_path = os.path.abspath(start_path)
+    target_file = target_file.lower()
+    key = (start_path, target_file) if max_depth is None else (start_path, target_file, max_depth)
+    if key in HOME_PATH_CACHE:
+        return HOME_PATH_CACHE[key]
+    # 常見情況是檔案就在起始資料夾中（例如解壓後的 node.exe），直接檢查即可，不必列出整個目錄樹
+    if os.path.isfile(os.path.join(start_path, target_file)):
+        HOME_PATH_CACHE[key] = start_path
+        return start_path
+    for root, files in walk_files(start_path, max_depth=max_depth):
+        if any(f.lower() == target_file for f in files):
+            HOME_PATH_CACHE[key] = root
             return root
     return None
 
+def find_home_paths(start_path, target_files):
+    """
+    只走訪一次起始資料夾，同時尋找多個 target_files，回傳 {小寫檔名: 所在資料夾}（只含找到的檔案）。
+    每個檔案的結果與分別呼叫 find_home_path 相同（依 walk_files（與 os.walk 相同）的順序取第一個包含該檔案的資料夾），
+    全部找到後即停止走訪；找到的結果同樣記錄於 HOME_PATH_CACHE。
+    """
+    start_path = os.path.abspath(start_path)
+    remaining = {target_file.lower() for target_file in target_files}
+    found = {}
+    if remaining:
+        for root, files in walk_files(start_path):
+            names = {f.lower() for f in files}
+            for target_file in remaining & names:
+                found[target_file] = root
+            remaining -= names
+            if not remaining:
+                break
+    remember_home_paths(start_path, found)
+    return found
+
+def remember_home_paths(start_path, found):
+    """
+    將 find_home_paths 的結果（可能來自其他行程，例如解壓工具包的子行程）記錄於 HOME_PATH_CACHE，
+    之後以相同起始資料夾呼叫 find_home_path 時不必再走訪目錄。
+    """
+    start_path = os.path.abspath(start_path)
+    for target_file, root in found.items():
+        HOME_PATH_CACHE[(start_path, target_file.lower())] = root
+
 def find_target_file_path(start_path, target_file):
     """
     從起始資料夾向下遞迴搜尋，找到某一個包含 target_file 的資料夾則回傳其路徑。
     找不到則回傳 None。
+    與 find_home_path 的搜尋相同，直接交由 find_home_path 處理，共用其記錄的結果與起始資料夾的快速檢查。
+    """
+    home_path = find_home_path(start_path, target_file)
+    return os.path.join(home_path, target_file) if home_path else None
+
+@lru_cache(maxsize=None)
+def compile_patterns(patterns, ignore_case=None):
     """
-    for root, _, files in os.walk(os.path.abspath(start_path)):
-        if any(f.lower() == target_file.lower() for f in files):
-            return os.path.join(root, target_file)
-    return None
\ No newline at end of file
+    將多個 fnmatch 樣式編譯為單一比對函式，避免在迴圈中逐一比對每個樣式。
+    patterns 須為 tuple，相同的樣式組合只會編譯一次，之後直接取用快取結果。
+    不含萬用字元（*、?、[）的樣式放入 frozenset 以雜湊查表比對，其餘樣式合併編譯為單一正規表達式。
+    ignore_case 未指定時依作業系統決定（Windows 不分大小寫，與 fnmatch.fnmatch 行為一致）。
+    patterns 為空時回傳永遠不相符的比對函式。
+    """
+    if ignore_case is None:
+        ignore_case = os.name == "nt"
+    literals = frozenset(
+        pattern.lower() if ignore_case else pattern
+        for pattern in patterns
+        if not any(c in pattern for c in "*?[")
+    )
+    wildcards = [pattern for pattern in patterns if any(c in pattern for c in "*?[")]
+    regex_match = None
+    if wildcards:
+        regex = "|".join(fnmatch.translate(pattern) for pattern in wildcards)
+        regex_match = re.compile(regex, re.IGNORECASE if ignore_case else 0).match
+
+    def match(name):
+        if (name.lower() if ignore_case else name) in literals:
+            return True
+        return regex_match is not None and regex_match(name) is not None
+
+    return match
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+IBM VSCode for Z Development Environment Setup Script
+開發單位: IBM Taiwan Technology Expert Labs
+版本: 2.6.0
+日期: 2025/01/13
+
+說明:
+1. 依 MS-SHLLINK 格式直接寫出 Windows 捷徑（.lnk）檔，不需啟動 WScript.Shell COM 服務，也不需 pywin32。
+2. 捷徑的目標以 LinkInfo 的本機路徑記錄，並寫入工作目錄、命令列參數與圖示位置（皆為 UTF-16LE）。
+
+更新記錄:
+- v2.6.0: 初始版本，提供不經 COM 建立捷徑的功能
+"""
+
+import os
+import struct
+
+# ShellLinkHeader 的固定大小與 CLSID（00021401-0000-0000-C000-000000000046）
+SHELL_LINK_HEADER_SIZE = 0x4C
+SHELL_LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+# LinkFlags
+HAS_LINK_INFO = 0x00000002
+HAS_WORKING_DIR = 0x00000010
+HAS_ARGUMENTS = 0x00000020
+HAS_ICON_LOCATION = 0x00000040
+IS_UNICODE = 0x00000080
+
+# LinkInfo 的 VolumeIDAndLocalBasePath 旗標，以及含 Unicode 路徑位移時的 LinkInfo 檔頭大小
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x00000001
+LINK_INFO_HEADER_SIZE = 0x24
+
+FILE_ATTRIBUTE_ARCHIVE = 0x00000020
+FILE_ATTRIBUTE_DIRECTORY = 0x00000010
+DRIVE_FIXED = 3
+SW_SHOWNORMAL = 1
+
+def get_volume_info(path):
+    """
+    回傳 path 所在磁碟的 (磁碟類型, 序號)；非 Windows 或查詢失敗時回傳 (DRIVE_FIXED, 0)。
+    """
+    if os.name != "nt":
+        return DRIVE_FIXED, 0
+    try:
+        import ctypes
+        root = os.path.splitdrive(os.path.abspath(path))[0] + "\\"
+        kernel32 = ctypes.windll.kernel32
+        serial = ctypes.c_uint32(0)
+        if not kernel32.GetVolumeInformationW(root, None, 0, ctypes.byref(serial), None, None, None, 0):
+            return DRIVE_FIXED, 0
+        return kernel32.GetDriveTypeW(root), serial.value
+    except (OSError, AttributeError):
+        return DRIVE_FIXED, 0
+
+def build_link_info(target_path):
+    """
+    組成 LinkInfo 結構：VolumeID 加上目標的本機路徑（ANSI 與 Unicode 各一份）。
+    """
+    drive_type, serial = get_volume_info(target_path)
+    # VolumeID：大小、磁碟類型、序號、標籤位移，後接空白的磁碟標籤
+    volume_id = struct.pack("<IIII", 16 + 1, drive_type, serial, 16) + b"\0"
+    ansi_encoding = "mbcs" if os.name == "nt" else "latin-1"
+    local_base_path = target_path.encode(ansi_encoding, errors="replace") + b"\0"
+    common_path_suffix = b"\0"
+    local_base_path_unicode = target_path.encode("utf-16-le") + b"\0\0"
+    common_path_suffix_unicode = b"\0\0"
+
+    volume_id_offset = LINK_INFO_HEADER_SIZE
+    local_base_path_offset = volume_id_offset + len(volume_id)
+    common_path_suffix_offset = local_base_path_offset + len(local_base_path)
+    local_base_path_offset_unicode = common_path_suffix_offset + len(common_path_suffix)
+    common_path_suffix_offset_unicode = local_base_path_offset_unicode + len(local_base_path_unicode)
+    link_info_size = common_path_suffix_offset_unicode + len(common_path_suffix_unicode)
+    header = struct.pack(
+        "<IIIIIIIII",
+        link_info_size,
+        LINK_INFO_HEADER_SIZE,
+        VOLUME_ID_AND_LOCAL_BASE_PATH,
+        volume_id_offset,
+        local_base_path_offset,
+        0,
+        common_path_suffix_offset,
+        local_base_path_offset_unicode,
+        common_path_suffix_offset_unicode
+    )
+    return b"".join([
+        header,
+        volume_id,
+        local_base_path,
+        common_path_suffix,
+        local_base_path_unicode,
+        common_path_suffix_unicode
+    ])
+
+def string_data(text):
+    """
+    組成 StringData：UTF-16 字元數（2 位元組）後接 UTF-16LE 內容，不含結尾的 null 字元。
+    """
+    encoded = text.encode("utf-16-le")
+    return struct.pack("<H", len(encoded) // 2) + encoded
+
+def write_shortcut(shortcut_path, target_path, arguments="", working_directory="", icon_location="", icon_index=0):
+    """
+    於 shortcut_path 寫出指向 target_path 的 Windows 捷徑檔。
+    arguments、working_directory、icon_location 為空字串時不寫入該欄位；icon_index 為圖示於 icon_location 中的索引。
+    以暫存檔寫入後再以 os.replace 取代，寫入失敗時不會留下不完整的捷徑檔。
+    """
+    target_path = os.path.abspath(target_path)
+    link_flags = HAS_LINK_INFO | IS_UNICODE
+    strings = []
+    # StringData 須依 NAME、RELATIVE_PATH、WORKING_DIR、COMMAND_LINE_ARGUMENTS、ICON_LOCATION 的順序排列
+    if working_directory:
+        link_flags |= HAS_WORKING_DIR
+        strings.append(string_data(working_directory))
+    if arguments:
+        link_flags |= HAS_ARGUMENTS
+        strings.append(string_data(arguments))
+    if icon_location:
+        link_flags |= HAS_ICON_LOCATION
+        strings.append(string_data(icon_location))
+
+    try:
+        st = os.stat(target_path)
+        file_size = st.st_size & 0xFFFFFFFF
+        file_attributes = FILE_ATTRIBUTE_DIRECTORY if os.path.isdir(target_path) else FILE_ATTRIBUTE_ARCHIVE
+    except OSError:
+        file_size = 0
+        file_attributes = FILE_ATTRIBUTE_ARCHIVE
+
+    # ShellLinkHeader：建立、存取、修改時間皆填 0，由系統於解析捷徑時自行取得
+    header = struct.pack(
+        "<I16sIIQQQIiIHHII",
+        SHELL_LINK_HEADER_SIZE,
+        SHELL_LINK_CLSID,
+        link_flags,
+        file_attributes,
+        0,
+        0,
+        0,
+        file_size,
+        icon_index,
+        SW_SHOWNORMAL,
+        0,
+        0,
+        0,
+        0
+    )
+    # 最後以 4 位元組的 0 作為 ExtraData 的 TerminalBlock
+    content = b"".join([header, build_link_info(target_path)] + strings + [b"\0\0\0\0"])
+    temp_path = f"{shortcut_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, shortcut_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
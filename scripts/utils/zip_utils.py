@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+IBM VSCode for Z Development Environment Setup Script
+開發單位: IBM Taiwan Technology Expert Labs
+版本: 2.6.0
+日期: 2025/01/13
+
+說明:
+1. 提供將預先壓縮的 DEFLATE 資料直接寫入 zip 的功能，供 build.py 平行壓縮後依序寫入。
+2. zipfile 沒有公開寫入預先壓縮資料的介面，所有對 ZipFile 內部狀態（fp、start_dir、filelist、NameToInfo、
+   _didModify、_writing）與 ZipInfo.FileHeader 的操作都集中於此模組；使用前以 raw_zip_supported 檢查，
+   不符合時呼叫端須改用公開的 ZipFile.write。
+3. 提供讀出 zip 項目壓縮後原始資料的功能（只使用 ZipInfo 的公開欄位與一般檔案物件），供增量打包時原樣沿用。
+
+更新記錄:
+- v2.6.0: 初始版本，集中管理寫入預先壓縮資料所需的 zipfile 內部操作
+"""
+
+import struct
+import zipfile
+
+# 寫入預先壓縮資料時會用到的 ZipFile 內部屬性
+RAW_ZIP_ATTRIBUTES = ("fp", "start_dir", "filelist", "NameToInfo", "_didModify", "_writing")
+
+# zip 本地檔頭的簽章與固定長度（APPNOTE 4.3.7）
+LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+LOCAL_FILE_HEADER_SIZE = 30
+
+def raw_zip_supported(zf):
+    """
+    檢查 zf 是否可直接寫入預先壓縮的資料：須為寫入模式、具備所需的內部屬性、輸出檔可 seek，
+    且 ZipInfo.FileHeader 產生的本地檔頭格式符合預期。任一條件不符合時回傳 False。
+    """
+    if zf.mode not in ("w", "a", "x"):
+        return False
+    if not all(hasattr(zf, name) for name in RAW_ZIP_ATTRIBUTES):
+        return False
+    if not callable(getattr(zipfile.ZipInfo, "FileHeader", None)):
+        return False
+    try:
+        if not zf.fp.seekable():
+            return False
+        # 以測試用的項目確認檔頭格式：簽章、固定長度加上檔名，且 CRC 與大小位於規格中的位置
+        zinfo = zipfile.ZipInfo("probe", (1980, 1, 1, 0, 0, 0))
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.CRC = 0x12345678
+        zinfo.compress_size = 3
+        zinfo.file_size = 5
+        header = zinfo.FileHeader(False)
+    except (AttributeError, OSError, TypeError, ValueError):
+        return False
+    return (
+        isinstance(header, bytes)
+        and header.startswith(LOCAL_FILE_HEADER_SIGNATURE)
+        and len(header) == LOCAL_FILE_HEADER_SIZE + len("probe")
+        and struct.unpack("<III", header[14:26]) == (0x12345678, 3, 5)
+    )
+
+def check_raw_zip_state(zf):
+    """
+    每次寫入前檢查 zf 仍可寫入：尚未關閉，且沒有以 ZipFile.open(..., "w") 開啟中的項目。
+    """
+    if zf.fp is None:
+        raise ValueError("zip 檔已關閉，無法寫入項目")
+    if zf._writing:
+        raise ValueError("zip 檔中有尚未關閉的寫入項目，無法同時寫入預先壓縮的資料")
+
+def seek_to_end_of_entries(zf):
+    """
+    將 zip 檔的寫入位置移至最後一個項目之後。已在該位置時不呼叫 seek，避免清空輸出檔的寫入緩衝區。
+    """
+    if zf.fp.tell() != zf.start_dir:
+        zf.fp.seek(zf.start_dir)
+
+def register_entry(zf, zinfo):
+    """
+    將已寫入的項目登錄至 zip 的中央目錄（於 ZipFile.close 時寫出）。
+    """
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+    zf._didModify = True
+
+def write_raw_entry(zf, zinfo, data, crc, file_size):
+    """
+    將完整的預先壓縮 DEFLATE 資料連同檔頭一次寫入 zip 檔。
+    CRC 與大小在寫入前皆已確定，不需回頭改寫檔頭，連續寫入可完整利用輸出檔的寫入緩衝區。
+    """
+    check_raw_zip_state(zf)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(data)
+    zip64 = file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    seek_to_end_of_entries(zf)
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.write(data)
+    register_entry(zf, zinfo)
+
+def begin_raw_entry(zf, zinfo, file_size):
+    """
+    開始在 zip 檔中寫入一個 DEFLATE 項目：先寫入本地檔頭，CRC 與壓縮後大小待資料寫完後由 end_raw_entry 回填。
+    比照 ZipFile.open(..., "w") 的流程操作其內部狀態。
+
+    :return: 是否使用 ZIP64 檔頭
+    """
+    check_raw_zip_state(zf)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = file_size
+    zinfo.compress_size = 0
+    zinfo.CRC = 0
+    # 與 zipfile 相同，預留壓縮後略大於原始大小的空間判斷是否需要 ZIP64
+    zip64 = file_size * 1.05 > zipfile.ZIP64_LIMIT
+    seek_to_end_of_entries(zf)
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader(zip64))
+    return zip64
+
+def write_raw_data(zf, data):
+    """
+    寫入 begin_raw_entry 開始的項目中的一段壓縮資料。
+    """
+    zf.fp.write(data)
+
+def end_raw_entry(zf, zinfo, crc, compress_size, zip64):
+    """
+    結束寫入 DEFLATE 項目：回填本地檔頭中的 CRC 與壓縮後大小，並登錄至中央目錄。
+    """
+    if not zip64 and compress_size > zipfile.ZIP64_LIMIT:
+        raise RuntimeError(f"{zinfo.filename} 壓縮後大小超出非 ZIP64 檔頭的上限")
+    zinfo.CRC = crc
+    zinfo.compress_size = compress_size
+    end_pos = zf.fp.tell()
+    zf.fp.seek(zinfo.header_offset)
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.seek(end_pos)
+    register_entry(zf, zinfo)
+
+def read_raw_entry(f, zinfo):
+    """
+    由已開啟的 zip 檔（一般的二進位檔案物件）讀出 zinfo 項目壓縮後的原始資料，不進行解壓縮。
+    只使用 ZipInfo 的公開欄位（header_offset、compress_size），並檢查本地檔頭的簽章。
+    """
+    f.seek(zinfo.header_offset)
+    header = f.read(LOCAL_FILE_HEADER_SIZE)
+    if len(header) != LOCAL_FILE_HEADER_SIZE or not header.startswith(LOCAL_FILE_HEADER_SIGNATURE):
+        raise zipfile.BadZipFile(f"{zinfo.filename} 的本地檔頭格式錯誤")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    f.seek(name_length + extra_length, 1)
+    data = f.read(zinfo.compress_size)
+    if len(data) != zinfo.compress_size:
+        raise zipfile.BadZipFile(f"{zinfo.filename} 的壓縮資料不完整")
+    return data
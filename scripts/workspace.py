@@ -9,7 +9,7 @@ IBM VSCode for Z Development Environment Setup Script
 透過指令列依序要求使用者輸入環境參數，內容包括：
   1. 伺服器位置，存入變數 host。
   2. 帳號名稱，存入變數 user。
-  3. 密碼，存入變數 password。
+  3. 密碼，存入變數 password（指定 -y 且設定了環境變數 IBM_VSCODE_PASSWORD 時直接使用該值，不再詢問）。
   4. 顯示選單讓使用者設定連線參數，其選項包括：
       1. 設定 zosmf：要求輸入連線 port，存入 zosmf_port。
       2. 設定 tso：要求輸入 tso 連線編碼，存入 tso_codepage。
@@ -18,6 +18,7 @@ IBM VSCode for Z Development Environment Setup Script
       5. 設定 rse：依序要求輸入 rse 連線 port和連線編碼，存入 rse_port 與 rse_encoding。
       6. 設定 debug：要求輸入 zOpenDebug 連線 port，存入 debug_port。
       7. 結束 workspace 設定：離開選單並開始更新 workspace/zowe.config.json 檔案內容。
+     指定 -y/--yes 時不顯示選單，直接以 DEFAULT_PROPERTIES 的預設連線參數更新檔案。
 
 使用方式:
   - 用 host 取代檔案內所有 _HOST_ 字樣
@@ -42,12 +43,26 @@ IBM VSCode for Z Development Environment Setup Script
 import os
 import sys
 import argparse
-import shutil
 import datetime
 import getpass
+import functools
+from types import MappingProxyType
 from pathlib import Path
 from utils.path_utils import get_script_dir
-from utils.file_utils import replace_in_file
+from utils.file_utils import replace_many_in_file, backup_file
+
+# 指定 -y 時可由此環境變數提供密碼，不需互動輸入
+PASSWORD_ENV_VAR = "IBM_VSCODE_PASSWORD"
+
+# 連線參數的預設值，以 MappingProxyType 包裝為唯讀（含各項目內層）；每次執行時複製為新的 dict 再依選單更新
+DEFAULT_PROPERTIES = MappingProxyType({
+    "zosmf": MappingProxyType({"port": 443}),
+    "tso": MappingProxyType({"codepage": 1047}),
+    "ssh": MappingProxyType({"port": 22}),
+    "ftp": MappingProxyType({"port": 21}),
+    "rse": MappingProxyType({"port": 6800, "encoding": "IBM-937"}),
+    "debug": MappingProxyType({"port": 8143})
+})
 
 # -------------------------------
 #  功能函式
@@ -59,6 +74,20 @@ def prompt_with_default(prompt_text, default_value):
     inp = input(prompt_text).strip()
     return inp if inp else default_value
 
+def read_password(prompt_text, allow_env=False):
+    """
+    讀取密碼。allow_env 為 True 且已設定 PASSWORD_ENV_VAR 環境變數時直接回傳該值；
+    標準輸入為終端機時以 getpass 隱藏輸入，否則（例如由管線或 CI 提供輸入）直接讀取標準輸入的一行，
+    Windows 上的 getpass 只讀取主控台，無法讀到管線傳入的內容。
+    """
+    if allow_env and os.environ.get(PASSWORD_ENV_VAR):
+        print(f"已由環境變數 {PASSWORD_ENV_VAR} 取得密碼。")
+        return os.environ[PASSWORD_ENV_VAR]
+    if sys.stdin.isatty():
+        return getpass.getpass(prompt_text)
+    print(prompt_text, end="", flush=True)
+    return sys.stdin.readline().rstrip("\r\n")
+
 # -------------------------------
 # 主流程
 # -------------------------------
@@ -76,34 +105,28 @@ def main():
     print("目前工作目錄設定為：", workspace)
     
     # 1. 請求使用者輸入基本參數：伺服器位置、帳號名稱、密碼
-    host = input("請輸入伺服器位置: ").strip()
-    # 檢查是否有任何輸入為空
-    if not host:
-        print("\n錯誤：所有基本參數皆必須輸入，請重新執行並提供完整資訊。")
-        sys.exit(1)
-    user = input("請輸入帳號名稱: ").strip()
-    # 檢查是否有任何輸入為空
-    if not user:
-        print("\n錯誤：所有基本參數皆必須輸入，請重新執行並提供完整資訊。")
-        sys.exit(1)
-    password = getpass.getpass("請輸入密碼: ").strip()
-    # 檢查是否有任何輸入為空
-    if not password:
-        print("\n錯誤：所有基本參數皆必須輸入，請重新執行並提供完整資訊。")
-        sys.exit(1)
+    basic_params = []
+    basic_prompts = (
+        ("請輸入伺服器位置: ", input),
+        ("請輸入帳號名稱: ", input),
+        ("請輸入密碼: ", functools.partial(read_password, allow_env=args.yes))
+    )
+    for prompt, read_input in basic_prompts:
+        value = read_input(prompt).strip()
+        # 檢查是否有任何輸入為空，輸入為空時立即結束，不再詢問後續參數
+        if not value:
+            print("\n錯誤：所有基本參數皆必須輸入，請重新執行並提供完整資訊。")
+            sys.exit(1)
+        basic_params.append(value)
+    host, user, password = basic_params
     
-    # 設定連線參數變數（初始值為 None，後續根據選單更新）
-    properties = {
-        "zosmf": {"port": 443},
-        "tso": {"codepage": 1047},
-        "ssh": {"port": 22},
-        "ftp": {"port": 21},
-        "rse": {"port": 6800, "encoding": "IBM-937"},
-        "debug": {"port": 8143}
-    }
+    # 設定連線參數變數（初始值為預設值，後續根據選單更新）
+    properties = {name: dict(values) for name, values in DEFAULT_PROPERTIES.items()}
     
-    # 4. 顯示選單，依使用者選擇設定連線參數
-    while True:
+    # 4. 顯示選單，依使用者選擇設定連線參數；指定 -y 時直接使用預設值，不等待選單輸入
+    if args.yes:
+        print("\n已指定 -y，使用預設的連線參數。")
+    while not args.yes:
         print("\n請選擇設定項目：")
         print("  1. 設定 zosmf")
         print("  2. 設定 tso")
@@ -164,23 +187,25 @@ def main():
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_path = os.path.join(workspace, "workspace", f"zowe.config.backup_{timestamp}.json")
     
-    # 執行備份
-    shutil.copy(config_path, backup_path)
+    # 執行備份：以硬連結保留目前的內容（之後的取代會另外寫出新檔案再取代設定檔，不會改到備份）
+    backup_file(config_path, backup_path)
     
     print(f"備份完成：{backup_path}")
     
-    # 根據使用者輸入值與預設值進行替換
-    replace_in_file(config_path, r"_HOST_", f"{host}")
-    replace_in_file(config_path, r"_USER_", f"{user}")
-    replace_in_file(config_path, r"_PASSWORD_", f"{password}")
-    
-    replace_in_file(config_path, r"\"_ZOSMF_PORT_\"", f"{properties['zosmf']['port']}")
-    replace_in_file(config_path, r"_TSO_CODEPAGE_", f"{properties['tso']['codepage']}")
-    replace_in_file(config_path, r"\"_SSH_PORT_\"", f"{properties['ssh']['port']}")
-    replace_in_file(config_path, r"\"_FTP_PORT_\"", f"{properties['ftp']['port']}")
-    replace_in_file(config_path, r"\"_RSE_PORT_\"", f"{properties['rse']['port']}")
-    replace_in_file(config_path, r"_RSE_ENCODING_", f"{properties['rse']['encoding']}")
-    replace_in_file(config_path, r"\"_DEBUG_PORT_\"", f"{properties['debug']['port']}")
+    # 根據使用者輸入值與預設值進行替換：所有取代一次完成，設定檔只讀寫一次
+    # 取代值原樣寫入（不經正規表達式處理），密碼等內容含有反斜線時也不會被轉換
+    replace_many_in_file(config_path, {
+        "_HOST_": f"{host}",
+        "_USER_": f"{user}",
+        "_PASSWORD_": f"{password}",
+        '"_ZOSMF_PORT_"': f"{properties['zosmf']['port']}",
+        "_TSO_CODEPAGE_": f"{properties['tso']['codepage']}",
+        '"_SSH_PORT_"': f"{properties['ssh']['port']}",
+        '"_FTP_PORT_"': f"{properties['ftp']['port']}",
+        '"_RSE_PORT_"': f"{properties['rse']['port']}",
+        "_RSE_ENCODING_": f"{properties['rse']['encoding']}",
+        '"_DEBUG_PORT_"': f"{properties['debug']['port']}",
+    })
     
     print("\nzowe.config.json 已成功更新！")
 
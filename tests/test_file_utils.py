@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+utils.file_utils 的測試：
+1. 解壓縮：有安裝 deflate 套件時，較小的 DEFLATE 項目以 libdeflate 一次解壓，
+   解壓後的內容須與原始資料相同，損毀的項目則須拋出 BadZipFile。
+2. rmtree_except：清空目錄後保留的項目須移回原目錄；無法移回時保留暫存目錄並列出其位置。
+
+執行方式:
+    python -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from utils import file_utils
+
+@unittest.skipIf(file_utils.deflate is None, "未安裝 deflate 套件")
+class InflateMemberTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.temp_dir, "source.zip")
+        self.contents = {
+            "a.txt": b"hello " * 1000,
+            "sub/b.bin": os.urandom(5000),
+            "sub/empty.txt": b"",
+        }
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in self.contents.items():
+                zf.writestr(name, data)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_extract_with_libdeflate(self):
+        extract_to = os.path.join(self.temp_dir, "out")
+        with mock.patch.object(file_utils, "inflate_member", wraps=file_utils.inflate_member) as inflate:
+            file_utils.extract_zip(self.zip_path, extract_to)
+        self.assertEqual(inflate.call_count, len(self.contents))
+        for name, data in self.contents.items():
+            with open(os.path.join(extract_to, *name.split("/")), "rb") as f:
+                self.assertEqual(f.read(), data, name)
+
+    def test_crc_mismatch(self):
+        with zipfile.ZipFile(self.zip_path) as zf:
+            member = zf.getinfo("a.txt")
+        member.CRC ^= 1
+        with open(self.zip_path, "rb") as f, self.assertRaises(zipfile.BadZipFile):
+            file_utils.inflate_member(f, member)
+
+    def test_truncated_data(self):
+        with zipfile.ZipFile(self.zip_path) as zf:
+            member = zf.getinfo("sub/b.bin")
+        with open(self.zip_path, "r+b") as f:
+            f.truncate(member.header_offset + 40)
+        with open(self.zip_path, "rb") as f, self.assertRaises(zipfile.BadZipFile):
+            file_utils.inflate_member(f, member)
+
+class RmtreeExceptTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.target_dir = os.path.join(self.temp_dir, "java")
+        os.makedirs(os.path.join(self.target_dir, "jdk", "bin"))
+        for name in ("jdk.zip", os.path.join("jdk", "bin", "java.exe")):
+            with open(os.path.join(self.target_dir, name), "wb") as f:
+                f.write(name.encode())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_keep(self):
+        self.assertTrue(file_utils.rmtree_except(self.target_dir, ["jdk.zip"]))
+        self.assertEqual(os.listdir(self.target_dir), ["jdk.zip"])
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["java"])
+
+    def test_restore_failure_keeps_holding_dir(self):
+        real_replace = os.replace
+
+        def failing_replace(src, dst):
+            # 只讓移回原目錄的動作失敗
+            if os.path.dirname(dst) == self.target_dir:
+                raise PermissionError("restore blocked")
+            real_replace(src, dst)
+
+        output = io.StringIO()
+        with mock.patch.object(file_utils.os, "replace", side_effect=failing_replace), contextlib.redirect_stdout(output):
+            file_utils.rmtree_except(self.target_dir, ["jdk.zip"])
+        holding = [name for name in os.listdir(self.temp_dir) if name.startswith(".keep_")]
+        self.assertEqual(len(holding), 1)
+        holding_dir = os.path.join(self.temp_dir, holding[0])
+        self.assertEqual(os.listdir(holding_dir), ["jdk.zip"])
+        self.assertIn(holding_dir, output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+utils.path_utils 的 escape_backslashes 測試：固定一般模式與 for_regex 模式的輸出。
+
+執行方式:
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from utils.path_utils import escape_backslashes
+
+class EscapeBackslashesTest(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(escape_backslashes("\\"), "\\\\")
+        self.assertEqual(escape_backslashes(r"C:\VSCode4z\java"), r"C:\\VSCode4z\\java")
+
+    def test_regex(self):
+        self.assertEqual(escape_backslashes("\\", for_regex=True), "\\\\\\\\")
+        self.assertEqual(escape_backslashes(r"C:\VSCode4z\java", for_regex=True), r"C:\\\\VSCode4z\\\\java")
+
+    def test_without_backslashes(self):
+        for for_regex in (False, True):
+            self.assertEqual(escape_backslashes("/opt/VSCode4z/java", for_regex=for_regex), "/opt/VSCode4z/java")
+            self.assertEqual(escape_backslashes("", for_regex=for_regex), "")
+
+if __name__ == "__main__":
+    unittest.main()
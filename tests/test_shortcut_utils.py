@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+utils.shortcut_utils 的捷徑檔測試：寫出 .lnk 後依 MS-SHLLINK 格式解析回來，
+確認 ShellLinkHeader、LinkInfo、各 StringData 與結尾的 TerminalBlock 皆符合規格。
+有安裝 pylnk3 時另以其解析結果交叉比對。
+
+執行方式:
+    python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from utils import shortcut_utils
+
+try:
+    import pylnk3
+except ImportError:
+    pylnk3 = None
+
+def read_utf16z(data, offset):
+    """讀出 offset 起以 UTF-16LE 編碼、以 null 字元結尾的字串。"""
+    end = offset
+    while data[end:end + 2] != b"\0\0":
+        end += 2
+    return data[offset:end].decode("utf-16-le")
+
+def parse_shortcut(path):
+    """依 MS-SHLLINK 格式解析捷徑檔，回傳檔頭欄位、LinkInfo 欄位、StringData 清單與其後剩餘的資料。"""
+    with open(path, "rb") as f:
+        data = f.read()
+    fields = struct.unpack("<I16sIIQQQIiIHHII", data[:0x4C])
+    header = {
+        "size": fields[0],
+        "clsid": fields[1],
+        "flags": fields[2],
+        "attributes": fields[3],
+        "file_size": fields[7],
+        "icon_index": fields[8],
+        "show_command": fields[9],
+    }
+    offset = header["size"]
+    link_info = None
+    if header["flags"] & shortcut_utils.HAS_LINK_INFO:
+        values = struct.unpack("<IIIIIIIII", data[offset:offset + 0x24])
+        names = ("size", "header_size", "flags", "volume_id_offset", "local_base_path_offset",
+                 "network_offset", "common_path_suffix_offset", "local_base_path_offset_unicode",
+                 "common_path_suffix_offset_unicode")
+        link_info = dict(zip(names, values))
+        block = data[offset:offset + link_info["size"]]
+        link_info["local_base_path_unicode"] = read_utf16z(block, link_info["local_base_path_offset_unicode"])
+        link_info["common_path_suffix_unicode"] = read_utf16z(block, link_info["common_path_suffix_offset_unicode"])
+        link_info["local_base_path"] = block[link_info["local_base_path_offset"]:block.index(b"\0", link_info["local_base_path_offset"])]
+        link_info["volume_id_size"] = struct.unpack("<I", block[link_info["volume_id_offset"]:link_info["volume_id_offset"] + 4])[0]
+        offset += link_info["size"]
+    strings = []
+    for flag in (shortcut_utils.HAS_WORKING_DIR, shortcut_utils.HAS_ARGUMENTS, shortcut_utils.HAS_ICON_LOCATION):
+        if header["flags"] & flag:
+            count = struct.unpack("<H", data[offset:offset + 2])[0]
+            strings.append((count, data[offset + 2:offset + 2 + count * 2].decode("utf-16-le")))
+            offset += 2 + count * 2
+    return header, link_info, strings, data[offset:]
+
+class WriteShortcutTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.target_dir = os.path.join(self.temp_dir, "VSCode 工具")
+        os.makedirs(self.target_dir)
+        self.target = os.path.join(self.target_dir, "vscode.cmd")
+        with open(self.target, "wb") as f:
+            f.write(b"@echo off\r\n")
+        self.shortcut = os.path.join(self.temp_dir, "VSCode.lnk")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_round_trip(self):
+        arguments = '/c "code --user-data-dir data"'
+        icon = os.path.join(self.target_dir, "Code.exe")
+        shortcut_utils.write_shortcut(self.shortcut, self.target, arguments=arguments,
+                                      working_directory=self.target_dir, icon_location=icon, icon_index=2)
+        header, link_info, strings, rest = parse_shortcut(self.shortcut)
+
+        self.assertEqual(header["size"], 0x4C)
+        self.assertEqual(header["clsid"], shortcut_utils.SHELL_LINK_CLSID)
+        self.assertEqual(header["clsid"].hex(), "0114020000000000c000000000000046")
+        self.assertEqual(header["flags"], shortcut_utils.HAS_LINK_INFO | shortcut_utils.IS_UNICODE
+                         | shortcut_utils.HAS_WORKING_DIR | shortcut_utils.HAS_ARGUMENTS | shortcut_utils.HAS_ICON_LOCATION)
+        self.assertEqual(header["attributes"], shortcut_utils.FILE_ATTRIBUTE_ARCHIVE)
+        self.assertEqual(header["file_size"], os.path.getsize(self.target))
+        self.assertEqual(header["icon_index"], 2)
+        self.assertEqual(header["show_command"], shortcut_utils.SW_SHOWNORMAL)
+
+        self.assertEqual(link_info["header_size"], 0x24)
+        self.assertEqual(link_info["flags"], shortcut_utils.VOLUME_ID_AND_LOCAL_BASE_PATH)
+        self.assertEqual(link_info["volume_id_offset"], 0x24)
+        self.assertEqual(link_info["local_base_path_offset"], link_info["volume_id_offset"] + link_info["volume_id_size"])
+        self.assertEqual(link_info["network_offset"], 0)
+        self.assertLess(link_info["local_base_path_offset"], link_info["common_path_suffix_offset"])
+        self.assertLess(link_info["common_path_suffix_offset"], link_info["local_base_path_offset_unicode"])
+        self.assertLess(link_info["local_base_path_offset_unicode"], link_info["common_path_suffix_offset_unicode"])
+        self.assertEqual(link_info["size"], link_info["common_path_suffix_offset_unicode"] + 2)
+        self.assertEqual(link_info["local_base_path_unicode"], os.path.abspath(self.target))
+        self.assertEqual(link_info["common_path_suffix_unicode"], "")
+        ansi_encoding = "mbcs" if os.name == "nt" else "latin-1"
+        self.assertEqual(link_info["local_base_path"], os.path.abspath(self.target).encode(ansi_encoding, errors="replace"))
+
+        self.assertEqual(strings, [
+            (len(self.target_dir), self.target_dir),
+            (len(arguments), arguments),
+            (len(icon), icon),
+        ])
+        self.assertEqual(rest, b"\0\0\0\0")
+
+    def test_optional_strings_omitted(self):
+        shortcut_utils.write_shortcut(self.shortcut, self.target)
+        header, link_info, strings, rest = parse_shortcut(self.shortcut)
+        self.assertEqual(header["flags"], shortcut_utils.HAS_LINK_INFO | shortcut_utils.IS_UNICODE)
+        self.assertEqual(link_info["local_base_path_unicode"], os.path.abspath(self.target))
+        self.assertEqual(strings, [])
+        self.assertEqual(rest, b"\0\0\0\0")
+        self.assertFalse([name for name in os.listdir(self.temp_dir) if name.endswith(".tmp")])
+
+    @unittest.skipIf(pylnk3 is None, "未安裝 pylnk3 套件")
+    def test_parsed_by_pylnk3(self):
+        # pylnk3 只讀取 ANSI 的 LocalBasePath，目標改用只含 ASCII 字元的路徑
+        target = os.path.join(self.temp_dir, "vscode.cmd")
+        shutil.copyfile(self.target, target)
+        arguments = "/c code"
+        shortcut_utils.write_shortcut(self.shortcut, target, arguments=arguments, working_directory=self.target_dir)
+        lnk = pylnk3.parse(self.shortcut)
+        self.assertEqual(lnk.arguments, arguments)
+        self.assertEqual(lnk.work_dir, self.target_dir)
+        self.assertEqual(lnk.link_info.local_base_path, os.path.abspath(target))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+build.py 以 utils.zip_utils 寫入預先壓縮資料的往返測試：新建、附加、增量沿用與不支援時的循序壓縮，
+皆以 ZipFile.testzip() 與解壓後的內容確認壓縮檔正確。
+
+執行方式:
+    python -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import build
+from utils import zip_utils
+
+class CompressDirectoryRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.temp_dir, "source")
+        self.output_zip = os.path.join(self.temp_dir, "output.zip")
+        self.write_file("a.txt", b"hello " * 1000)
+        self.write_file(os.path.join("sub", "b.bin"), os.urandom(5000))
+        self.write_file(os.path.join("sub", "deep", "empty.txt"), b"")
+        # 大於區段大小的檔案會分段平行壓縮，並回填本地檔頭
+        self.write_file("large.bin", os.urandom(100 << 10) + b"x" * (200 << 10))
+        self.write_file(os.path.join("extra", "c.txt"), b"appended later")
+        chunk_patch = mock.patch.object(build, "DEFLATE_CHUNK_SIZE", 64 << 10)
+        chunk_patch.start()
+        self.addCleanup(chunk_patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write_file(self, relative_path, data):
+        path = os.path.join(self.source_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def compress(self, **kwargs):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(build.compress_directory(self.source_dir, self.output_zip, **kwargs))
+        return output.getvalue()
+
+    def assert_archive_matches(self, expected_names):
+        with zipfile.ZipFile(self.output_zip) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(sorted(zf.namelist()), sorted(expected_names))
+            for name in expected_names:
+                with open(os.path.join(self.source_dir, *name.split("/")), "rb") as f:
+                    self.assertEqual(zf.read(name), f.read(), name)
+
+    def all_names(self):
+        return ["a.txt", "sub/b.bin", "sub/deep/empty.txt", "large.bin", "extra/c.txt"]
+
+    def test_fresh(self):
+        self.compress()
+        self.assert_archive_matches(self.all_names())
+
+    def test_append(self):
+        self.compress(exclude_top_level=("extra",))
+        self.assert_archive_matches([name for name in self.all_names() if not name.startswith("extra/")])
+        self.compress(include_top_level=("extra",), append=True)
+        self.assert_archive_matches(self.all_names())
+
+    def test_incremental_reuse(self):
+        self.compress()
+        # 修改一個檔案（大小與修改時間皆改變），其餘檔案應直接沿用舊壓縮檔中的資料
+        self.write_file("a.txt", b"changed")
+        future = time.time() + 10
+        os.utime(os.path.join(self.source_dir, "a.txt"), (future, future))
+        output = self.compress()
+        self.assertIn("沿用上次壓縮結果 4 個檔案，重新壓縮 1 個檔案", output)
+        self.assert_archive_matches(self.all_names())
+
+    def test_corrupt_previous_zip(self):
+        self.compress()
+        # 壓縮檔損毀但 manifest 仍在：應捨棄 manifest 並全部重新壓縮，而不是每次打包都失敗
+        with open(self.output_zip, "wb") as f:
+            f.write(os.urandom(1000))
+        output = self.compress()
+        self.assertIn("捨棄其 manifest 並全部重新壓縮", output)
+        self.assert_archive_matches(self.all_names())
+        self.assertTrue(os.path.isfile(self.output_zip + ".manifest.json"))
+        output = self.compress()
+        self.assertIn("沿用上次壓縮結果 5 個檔案，重新壓縮 0 個檔案", output)
+        self.assert_archive_matches(self.all_names())
+
+    def test_fallback_without_raw_support(self):
+        with mock.patch.object(build, "raw_zip_supported", return_value=False):
+            output = self.compress()
+        self.assertIn("改為循序壓縮", output)
+        self.assert_archive_matches(self.all_names())
+
+class RawZipSupportedTest(unittest.TestCase):
+    def test_supported_for_writable_zip(self):
+        with zipfile.ZipFile(io.BytesIO(), "w") as zf:
+            self.assertTrue(zip_utils.raw_zip_supported(zf))
+
+    def test_not_supported_for_read_mode(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            zf.writestr("a.txt", b"a")
+        with zipfile.ZipFile(buffer, "r") as zf:
+            self.assertFalse(zip_utils.raw_zip_supported(zf))
+
+    def test_rejects_open_writer(self):
+        with zipfile.ZipFile(io.BytesIO(), "w") as zf:
+            with zf.open("a.txt", "w") as f:
+                f.write(b"a")
+                with self.assertRaises(ValueError):
+                    zip_utils.write_raw_entry(zf, zipfile.ZipInfo("b.txt"), b"\x03\x00", 0, 0)
+
+if __name__ == "__main__":
+    unittest.main()